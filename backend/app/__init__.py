@@ -8,6 +8,13 @@ from .models import ClassificationModelManager, VectorizerManager
 from .schemas import (
     ClassificationRequest,
     ClassificationResponse,
+    BatchClassificationRequest,
+    BatchClassificationResult,
+    BatchTiming,
+    BatchClassificationResponse,
+    IncrementalTrainingRequest,
+    IncrementalTrainingResponse,
+    RetrainRequest,
     ModelPrediction,
     TrainingStatus,
     HealthResponse,
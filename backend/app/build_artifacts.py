@@ -0,0 +1,30 @@
+"""
+Train all models once and write the artifact bundle that the API loads on startup.
+
+Usage: python -m app.build_artifacts --sample-size 1000 --output ./cache/artifacts
+"""
+
+import argparse
+import asyncio
+
+from app import classification_service
+from app.config import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the classifier artifact bundle")
+    parser.add_argument('--sample-size', type=int, default=settings.sample_size)
+    parser.add_argument('--output', default=settings.artifact_dir)
+    args = parser.parse_args()
+
+    settings.artifact_dir = args.output
+    settings.load_artifacts = False
+    settings.save_artifacts = True
+    # Train every method before exiting so the bundle is complete
+    settings.background_warmup = False
+
+    asyncio.run(classification_service.initialize(sample_size=args.sample_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Classify a local JSONL or CSV corpus and write one NDJSON result line per record.
+
+Records need a `text` or `abstract` field (an `id` field is passed through).
+The file is streamed in chunks, so memory use doesn't grow with its size.
+
+Usage: python -m app.bulk_classify abstracts.jsonl --method tfidf --output results.ndjson
+"""
+
+import argparse
+import asyncio
+import contextlib
+import sys
+
+from app import classification_service
+from app.config import settings
+from app.services.bulk_classification import INPUT_FORMATS, detect_format, classify_stream
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-classify a JSONL/CSV corpus into NDJSON")
+    parser.add_argument('input', help="JSONL or CSV file, or - for stdin")
+    parser.add_argument('--format', choices=INPUT_FORMATS, default=None, help="Default: from the file extension")
+    parser.add_argument('--method', default='embeddings', choices=settings.enabled_methods + ['cascade'])
+    parser.add_argument('--model', default=None, choices=classification_service.model_names)
+    parser.add_argument('--chunk-size', type=int, default=settings.bulk_chunk_size)
+    parser.add_argument('--include-text', action='store_true', help="Echo each input text in the output")
+    parser.add_argument('--output', default='-', help="Output file, or - for stdout")
+    args = parser.parse_args()
+
+    # Load or train every enabled method before reading the corpus; keep
+    # progress messages out of the NDJSON on stdout
+    settings.background_warmup = False
+    with contextlib.redirect_stdout(sys.stderr):
+        asyncio.run(classification_service.initialize(sample_size=settings.sample_size))
+
+    input_format = args.format or detect_format(args.input)
+    source = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8', newline='')
+    target = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        for lines in classify_stream(
+            classification_service,
+            source,
+            input_format=input_format,
+            vectorization_method=args.method,
+            model_name=args.model,
+            chunk_size=args.chunk_size,
+            include_text=args.include_text
+        ):
+            target.write(lines)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+
+if __name__ == "__main__":
+    main()
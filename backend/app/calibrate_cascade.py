@@ -0,0 +1,72 @@
+"""
+Calibrate the cascade gate threshold on the held-out split of the training data.
+
+Runs the gate model (CASCADE_GATE_MODEL on CASCADE_FIRST_METHOD) and the
+escalation model (CASCADE_ESCALATION_MODEL on CASCADE_ESCALATION_METHOD) over
+the held-out texts. It then picks the threshold that escalates the fewest
+texts while the cascade still reaches the target accuracy. The result is
+written to CASCADE_CALIBRATION_FILE and picked up on the next start.
+
+Usage: python -m app.calibrate_cascade --target-accuracy 0.95
+"""
+
+import argparse
+import asyncio
+import json
+
+import numpy as np
+
+from app import classification_service
+from app.config import settings
+from app.services.cascade import calibrate_threshold, save_calibration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the cascade confidence threshold")
+    parser.add_argument('--target-accuracy', type=float, required=True)
+    parser.add_argument('--sample-size', type=int, default=settings.sample_size)
+    parser.add_argument('--output', default=settings.cascade_calibration_file)
+    args = parser.parse_args()
+
+    settings.background_warmup = False
+    asyncio.run(classification_service.initialize(sample_size=args.sample_size))
+
+    # The same split as training, so the held-out texts were never fitted on
+    _, X_test, _, y_test = classification_service.load_training_data(args.sample_size)
+    y_test = np.asarray(y_test)
+
+    vectorizer_manager = classification_service.vectorizer_manager
+    model_manager = classification_service.model_manager
+
+    X_first = vectorizer_manager.transform_texts(X_test, settings.cascade_first_method)
+    gate_predictions, confidences = model_manager.predict(
+        X_first, f"{settings.cascade_gate_model}_{settings.cascade_first_method}"
+    )
+    X_escalated = vectorizer_manager.transform_texts(X_test, settings.cascade_escalation_method)
+    escalated_predictions, _ = model_manager.predict(
+        X_escalated, f"{settings.cascade_escalation_model}_{settings.cascade_escalation_method}"
+    )
+
+    calibration = calibrate_threshold(
+        confidences,
+        np.asarray(gate_predictions) == y_test,
+        np.asarray(escalated_predictions) == y_test,
+        args.target_accuracy
+    )
+    calibration.update({
+        'first_method': settings.cascade_first_method,
+        'gate_model': settings.cascade_gate_model,
+        'escalation_method': settings.cascade_escalation_method,
+        'escalation_model': settings.cascade_escalation_model,
+        'artifact_id': classification_service.artifact_id
+    })
+
+    save_calibration(args.output, calibration)
+    print(json.dumps(calibration, indent=2))
+    if not calibration['target_met']:
+        print(f"Target accuracy {args.target_accuracy} is not reachable; using the most accurate threshold")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Accuracy check for an optimized embedding backend against the fp32 baseline.
+
+Encodes a held-out split of the training data with both backends and reports:
+- embedding agreement: cosine similarity between matching vectors
+- downstream agreement: each model is trained and evaluated on each backend's
+  embeddings; reports accuracy, the accuracy drop and the share of identical predictions
+- encoding throughput of both backends
+
+Exits with status 1 when the candidate exceeds the allowed accuracy loss.
+
+Usage: python -m app.check_embedding_backend --backend int8 --output backend_check.json
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from app.config import settings
+from app.models.classification_models import ClassificationModelManager, fit_model
+from app.models.embedding_backends import EMBEDDING_BACKENDS, compare_embeddings
+from app.models.vectorizers import EmbeddingVectorizer
+from app.services.classification_service import ClassificationService
+from app.services.data_ingestion import TrainingDataLoader
+
+
+def encode(vectorizer: EmbeddingVectorizer, texts, batch_size: int = 64):
+    """Encode texts in batches and return the vectors and docs/s"""
+    vectorizer.model  # load outside the timed region
+    start = time.perf_counter()
+    vectors = np.concatenate([
+        vectorizer.fit_transform(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)
+    ])
+    return vectors, len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare an embedding backend with the fp32 baseline")
+    parser.add_argument('--backend', required=True, choices=EMBEDDING_BACKENDS)
+    parser.add_argument('--baseline', default='torch', choices=EMBEDDING_BACKENDS)
+    parser.add_argument('--sample-size', type=int, default=settings.sample_size)
+    parser.add_argument('--corpus', default=settings.training_data, help="Local training data (default: TRAINING_DATA)")
+    parser.add_argument('--min-cosine', type=float, default=0.99, help="Minimum mean cosine similarity")
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01, help="Maximum accuracy loss of any model")
+    parser.add_argument('--output', default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+    if args.backend == args.baseline:
+        parser.error("--backend must differ from --baseline")
+
+    service = ClassificationService()
+    loader = TrainingDataLoader(
+        categories=service.categories,
+        source=args.corpus,
+        dataset_name=service.dataset_name,
+        chunk_size=settings.ingest_chunk_size,
+        workers=settings.ingest_workers,
+        per_category=settings.samples_per_category
+    )
+    texts, labels = loader.load(args.sample_size)
+    y = [service.label_to_id[label] for label in labels]
+    X_train, X_test, y_train, y_test = train_test_split(
+        texts, y, test_size=0.2, random_state=42, stratify=y
+    )
+    y_test = np.asarray(y_test)
+
+    embeddings = {}
+    throughput = {}
+    for backend in [args.baseline, args.backend]:
+        print(f"Encoding {len(texts)} texts with the {backend} backend...")
+        vectorizer = EmbeddingVectorizer(backend=backend)
+        train_vectors, _ = encode(vectorizer, X_train)
+        test_vectors, docs_per_s = encode(vectorizer, X_test)
+        embeddings[backend] = (train_vectors, test_vectors)
+        throughput[backend] = docs_per_s
+
+    similarity = compare_embeddings(embeddings[args.baseline][1], embeddings[args.backend][1])
+
+    manager = ClassificationModelManager(service.label_to_id, service.id_to_label)
+    downstream = {}
+    for model_name in service.model_names:
+        predictions = {}
+        for backend, (train_vectors, test_vectors) in embeddings.items():
+            model_key = f"{model_name}_{backend}"
+            model = manager.create_model(model_name, 'embeddings')
+            model, cluster_label_counts = fit_model(model_name, model, train_vectors, np.asarray(y_train))
+            manager.set_trained_model(model_key, model, cluster_label_counts)
+            predictions[backend] = np.asarray(manager.predict(test_vectors, model_key)[0])
+
+        baseline_accuracy = float(np.mean(predictions[args.baseline] == y_test))
+        candidate_accuracy = float(np.mean(predictions[args.backend] == y_test))
+        downstream[model_name] = {
+            'baseline_accuracy': baseline_accuracy,
+            'candidate_accuracy': candidate_accuracy,
+            'accuracy_drop': baseline_accuracy - candidate_accuracy,
+            'prediction_agreement': float(np.mean(predictions[args.baseline] == predictions[args.backend]))
+        }
+
+    worst_drop = max(result['accuracy_drop'] for result in downstream.values())
+    passed = similarity['mean_cosine'] >= args.min_cosine and worst_drop <= args.max_accuracy_drop
+
+    results = {
+        'baseline': args.baseline,
+        'backend': args.backend,
+        'test_size': len(X_test),
+        'embedding_similarity': similarity,
+        'downstream': downstream,
+        'throughput_docs_per_s': throughput,
+        'speedup': throughput[args.backend] / throughput[args.baseline],
+        'thresholds': {'min_cosine': args.min_cosine, 'max_accuracy_drop': args.max_accuracy_drop},
+        'passed': passed
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if not passed:
+        print(f"{args.backend} exceeds the allowed accuracy loss against {args.baseline}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Runtime configuration read from environment variables
+"""
+
+import os
+
+
+def _get_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _get_limits(name: str, default: str) -> dict:
+    """Parse 'key:value,...' pairs into a dict of ints"""
+    limits = {}
+    for item in os.getenv(name, default).split(','):
+        if ':' in item:
+            key, value = item.split(':', 1)
+            limits[key.strip()] = int(value)
+    return limits
+
+
+class Settings:
+    def __init__(self):
+        self.model_cache_dir = os.getenv('MODEL_CACHE_DIR', './cache')
+        self.sample_size = int(os.getenv('SAMPLE_SIZE', '1000'))
+        self.max_batch_size = int(os.getenv('MAX_BATCH_SIZE', '1000'))
+        self.bulk_chunk_size = int(os.getenv('BULK_CHUNK_SIZE', '500'))
+
+        # Vectorization methods to serve; disabled methods are never loaded or trained.
+        # With background warm-up, heavy methods (embeddings) load after the others are serving.
+        self.enabled_methods = [
+            method.strip() for method in os.getenv('ENABLED_METHODS', 'bow,tfidf,embeddings').split(',')
+            if method.strip()
+        ]
+        self.background_warmup = _get_bool('BACKGROUND_WARMUP', True)
+
+        # Hashing vectorizer: tokens hashed into a fixed number of columns, no vocabulary.
+        # HASHING_IDF adds idf weights gathered in one streaming pass over the training texts.
+        self.hashing_features = int(os.getenv('HASHING_FEATURES', str(2 ** 18)))
+        self.hashing_idf = _get_bool('HASHING_IDF', False)
+
+        # Training data: local Parquet/JSONL/Arrow file, directory or glob.
+        # Empty means stream the Hugging Face dataset.
+        self.training_data = os.getenv('TRAINING_DATA') or None
+        self.ingest_workers = int(os.getenv('INGEST_WORKERS', str(os.cpu_count() or 1)))
+        self.ingest_chunk_size = int(os.getenv('INGEST_CHUNK_SIZE', '1000'))
+        self.samples_per_category = int(os.getenv('SAMPLES_PER_CATEGORY', '0')) or None
+
+        # Processes used to fit the model/vectorizer combinations (-1 = all CPUs, 1 = sequential)
+        self.training_jobs = int(os.getenv('TRAINING_JOBS', '-1'))
+
+        # KNN on embeddings: 'exact' (scikit-learn) or 'ivf' (approximate inverted file index)
+        self.knn_index = os.getenv('KNN_INDEX', 'exact')
+        self.knn_ivf_lists = int(os.getenv('KNN_IVF_LISTS', '0')) or None
+        self.knn_ivf_probe = int(os.getenv('KNN_IVF_PROBE', '8'))
+
+        # Prebuilt artifact bundle (fitted vectorizers + trained models)
+        self.artifact_dir = os.getenv(
+            'ARTIFACT_DIR', os.path.join(self.model_cache_dir, 'artifacts')
+        )
+        self.load_artifacts = _get_bool('LOAD_ARTIFACTS', True)
+        self.save_artifacts = _get_bool('SAVE_ARTIFACTS', True)
+        # Memory-map the arrays of a loaded bundle so processes share one copy in the page cache
+        self.artifact_mmap = _get_bool('ARTIFACT_MMAP', True)
+
+        # Embedding cache: bounded in-memory LRU plus memory-mapped on-disk store
+        self.embedding_cache_size = int(os.getenv('EMBEDDING_CACHE_SIZE', '10000'))
+        self.embedding_cache_disk = _get_bool('EMBEDDING_CACHE_DISK', True)
+        self.embedding_cache_dir = os.getenv(
+            'EMBEDDING_CACHE_DIR', os.path.join(self.model_cache_dir, 'embeddings')
+        )
+
+        # Encoder inference backend: torch (fp32), int8, onnx or onnx-int8
+        self.embedding_backend = os.getenv('EMBEDDING_BACKEND', 'torch')
+        self.onnx_quantization = os.getenv('ONNX_QUANTIZATION', 'avx512_vnni')
+
+        # Encoder batching: inputs are sorted by token length and batched up to a number of
+        # texts (serving / training) and of padded tokens (0 = no token budget).
+        # Texts over the encoder's limit are truncated or, with 'chunk', split and mean-pooled.
+        self.embedding_batch_size = int(os.getenv('EMBEDDING_BATCH_SIZE', '32'))
+        self.embedding_train_batch_size = int(os.getenv('EMBEDDING_TRAIN_BATCH_SIZE', '64'))
+        self.embedding_max_batch_tokens = int(os.getenv('EMBEDDING_MAX_BATCH_TOKENS', '16384'))
+        self.embedding_long_text = os.getenv('EMBEDDING_LONG_TEXT', 'truncate')
+        self.embedding_chunk_overlap = int(os.getenv('EMBEDDING_CHUNK_OVERLAP', '64'))
+
+        # Cascade mode: the gate model on the first method answers when confident,
+        # otherwise the text is escalated. CASCADE_THRESHOLD overrides the calibrated value.
+        self.cascade_first_method = os.getenv('CASCADE_FIRST_METHOD', 'tfidf')
+        self.cascade_gate_model = os.getenv('CASCADE_GATE_MODEL', 'naive_bayes')
+        self.cascade_escalation_method = os.getenv('CASCADE_ESCALATION_METHOD', 'embeddings')
+        self.cascade_escalation_model = os.getenv('CASCADE_ESCALATION_MODEL', 'knn')
+        self.cascade_threshold = float(os.getenv('CASCADE_THRESHOLD')) if os.getenv('CASCADE_THRESHOLD') else None
+        self.cascade_calibration_file = os.getenv(
+            'CASCADE_CALIBRATION_FILE', os.path.join(self.model_cache_dir, 'cascade_calibration.json')
+        )
+
+        # Inference worker pool: 'thread' or 'process'; sizes default from the CPU count
+        self.inference_executor = os.getenv('INFERENCE_EXECUTOR', 'thread')
+        self.inference_workers = int(os.getenv('INFERENCE_WORKERS', '0')) or None
+        self.inference_threads_per_worker = int(os.getenv('INFERENCE_THREADS_PER_WORKER', '0')) or None
+
+        # Responses to repeated /classify requests, keyed on the preprocessed text, method,
+        # model and generation. 'sqlite' shares the cache between serving workers.
+        self.response_cache = _get_bool('RESPONSE_CACHE', True)
+        self.response_cache_size = int(os.getenv('RESPONSE_CACHE_SIZE', '10000'))
+        self.response_cache_ttl = float(os.getenv('RESPONSE_CACHE_TTL', '3600'))
+        self.response_cache_backend = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')
+        self.response_cache_path = os.getenv(
+            'RESPONSE_CACHE_PATH', os.path.join(self.model_cache_dir, 'responses.sqlite3')
+        )
+
+        # Micro-batching of concurrent /classify embedding requests
+        self.micro_batching = _get_bool('MICRO_BATCHING', True)
+        self.micro_batch_window_ms = float(os.getenv('MICRO_BATCH_WINDOW_MS', '5'))
+        self.micro_batch_max_size = int(os.getenv('MICRO_BATCH_MAX_SIZE', '32'))
+        self.micro_batch_max_queue = int(os.getenv('MICRO_BATCH_MAX_QUEUE', '1000'))
+
+        # Admission control: requests in flight per method and requests waiting for a slot.
+        # Bulk requests may hold ADMISSION_BULK_SHARE of the slots; interactive ones go first.
+        self.admission_control = _get_bool('ADMISSION_CONTROL', True)
+        self.admission_max_in_flight = _get_limits(
+            'ADMISSION_MAX_IN_FLIGHT', 'bow:64,tfidf:64,hashing:64,embeddings:32,cascade:32'
+        )
+        self.admission_max_queue = int(os.getenv('ADMISSION_MAX_QUEUE', '128'))
+        self.admission_bulk_share = float(os.getenv('ADMISSION_BULK_SHARE', '0.5'))
+        # Default deadline of /classify and /classify/batch requests (0 = none)
+        self.request_timeout_ms = float(os.getenv('REQUEST_TIMEOUT_MS', '30000'))
+
+        # Serving processes (uvicorn --workers). With more than one, a single worker
+        # trains while the others wait for its bundle, and readiness is pool-wide.
+        self.serving_workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+        self.pool_state_dir = os.getenv('POOL_STATE_DIR', os.path.join(self.model_cache_dir, 'workers'))
+        self.pool_sync_interval = float(os.getenv('POOL_SYNC_INTERVAL', '5'))
+
+
+settings = Settings()
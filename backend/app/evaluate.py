@@ -0,0 +1,123 @@
+"""
+Evaluate every {model}_{method} combination on held-out texts and report
+which ones are worth serving.
+
+For each trained combination this measures accuracy, macro-F1 and the
+confusion matrix, single-text p50/p99 latency (vectorize + predict; the
+shared preprocessing step is left out), batch throughput and the memory
+held by the model and its vectorizer. Combinations on the accuracy vs
+latency Pareto front (and the accuracy vs latency vs memory front) are
+marked in the report.
+
+The held-out texts are the test split of the training data, or a local
+corpus (JSONL, Parquet or Arrow, as for TRAINING_DATA) that the models
+were not trained on.
+
+Usage: python -m app.evaluate --corpus held_out.jsonl --output evaluation.json --markdown evaluation.md
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+from app import classification_service
+from app.config import settings
+from app.services.data_ingestion import TrainingDataLoader
+from app.services.evaluation import (
+    encoder_nbytes, format_markdown, measure_memory, measure_performance, pareto_front, score_combinations
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate accuracy, latency and memory of every model/method combination")
+    parser.add_argument('--corpus', default=None, help="Held-out corpus; defaults to the test split of the training data")
+    parser.add_argument('--max-texts', type=int, default=2000, help="Held-out texts to read from --corpus")
+    parser.add_argument('--sample-size', type=int, default=settings.sample_size)
+    parser.add_argument('--latency-queries', type=int, default=200)
+    parser.add_argument('--jobs', type=int, default=settings.training_jobs, help="Combinations scored in parallel (-1 = all CPUs)")
+    parser.add_argument('--with-cache', action='store_true', help="Keep the embedding cache enabled while timing")
+    parser.add_argument('--output', default='evaluation_report.json')
+    parser.add_argument('--markdown', default=None, help="Also write the report table as Markdown")
+    args = parser.parse_args()
+
+    settings.background_warmup = False
+    # Measure models in process memory rather than in the shared page cache
+    settings.artifact_mmap = False
+    asyncio.run(classification_service.initialize(sample_size=args.sample_size))
+
+    service = classification_service
+    vectorizer_manager = service.vectorizer_manager
+    model_manager = service.model_manager
+    if not args.with_cache:
+        # Every text is encoded, as it would be the first time it is seen
+        vectorizer_manager.embedding_vectorizer.cache = None
+
+    if args.corpus:
+        loader = TrainingDataLoader(
+            categories=service.categories,
+            source=args.corpus,
+            chunk_size=settings.ingest_chunk_size,
+            workers=settings.ingest_workers
+        )
+        texts, labels = loader.load(args.max_texts)
+        y = [service.label_to_id[label] for label in labels]
+    else:
+        # The same split as training, so the held-out texts were never fitted on
+        _, texts, _, y = service.load_training_data(args.sample_size)
+    if not texts:
+        raise SystemExit("No held-out texts to evaluate on")
+    queries = texts[:args.latency_queries]
+    jobs = (os.cpu_count() or 1) if args.jobs == -1 else args.jobs
+
+    print(f"Scoring {len(texts)} held-out texts with {jobs} parallel jobs...")
+    combinations = score_combinations(
+        vectorizer_manager, model_manager, texts, y, service.methods, service.model_names,
+        n_labels=len(service.categories), jobs=jobs
+    )
+
+    encoder_bytes = encoder_nbytes(vectorizer_manager.embedding_vectorizer) if 'embeddings' in service.methods else None
+    for method in service.methods:
+        model_keys = [model_key for model_key in combinations if model_key.endswith(f"_{method}")]
+        if not model_keys:
+            continue
+        print(f"Measuring latency and throughput of {method}...")
+        performance = measure_performance(vectorizer_manager, model_manager, texts, queries, method, model_keys)
+        for model_key in model_keys:
+            combinations[model_key].update(performance[model_key])
+            combinations[model_key]['memory'] = measure_memory(
+                vectorizer_manager, model_manager, model_key, method, encoder_bytes
+            )
+            combinations[model_key]['memory_bytes'] = combinations[model_key]['memory']['total_bytes']
+
+    latency_front = pareto_front(combinations, maximize=['accuracy'], minimize=['p50_ms'])
+    memory_front = pareto_front(combinations, maximize=['accuracy'], minimize=['p50_ms', 'memory_bytes'])
+    for model_key, row in combinations.items():
+        row['pareto_optimal'] = model_key in latency_front
+        row['pareto_optimal_with_memory'] = model_key in memory_front
+
+    report = {
+        'corpus': args.corpus or f"test split of {settings.training_data or service.dataset_name}",
+        'test_texts': len(texts),
+        'latency_queries': len(queries),
+        'embedding_cache': args.with_cache,
+        'artifact_id': service.artifact_id,
+        'generation_id': service.generation.generation_id,
+        'labels': service.categories,
+        'pareto_front': sorted(latency_front, key=lambda key: combinations[key]['p50_ms']),
+        'pareto_front_with_memory': sorted(memory_front, key=lambda key: combinations[key]['p50_ms']),
+        'combinations': combinations
+    }
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    markdown = format_markdown(report)
+    if args.markdown:
+        with open(args.markdown, 'w', encoding='utf-8') as f:
+            f.write(markdown)
+    print(markdown)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
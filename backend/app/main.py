@@ -1,13 +1,30 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from contextlib import nullcontext
 from datetime import datetime
+from typing import Optional
+import io
+import json
 import logging
+import time
 
 from app import classification_service
+from app.config import settings
+from app.services.micro_batcher import QueueFullError
+from app.services.admission import OverloadedError, DeadlineExceededError
+from app.services.bulk_classification import (
+    INPUT_FORMATS, detect_format, iter_records, iter_chunks, texts_to_classify, format_chunk
+)
+from app.utils.metrics import registry, HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_IN_FLIGHT
 from app import (
     ClassificationRequest,
     ClassificationResponse,
+    BatchClassificationRequest,
+    BatchClassificationResponse,
+    IncrementalTrainingRequest,
+    IncrementalTrainingResponse,
+    RetrainRequest,
     TrainingStatus,
     HealthResponse,
     ErrorResponse
@@ -35,6 +52,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and track latency and in-flight requests per route"""
+    path = request.url.path
+    if path == '/metrics':
+        return await call_next(request)
+    
+    # Keep label cardinality bounded for unknown paths
+    if path not in {route.path for route in app.routes}:
+        path = 'other'
+    
+    HTTP_IN_FLIGHT.inc(path=path)
+    start_time = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec(path=path)
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - start_time, path=path)
+        HTTP_REQUESTS.inc(path=path, status=str(status_code))
+
 # Global initialization flag
 is_initializing = False
 initialization_complete = False
@@ -49,7 +89,9 @@ async def startup_event():
         logger.info("Starting classification service initialization...")
         
         try:
-            await classification_service.initialize(sample_size=1000)
+            await classification_service.initialize(sample_size=settings.sample_size)
+            classification_service.start_workers(sample_size=settings.sample_size)
+            classification_service.start_pool_sync()
             initialization_complete = True
             logger.info("Classification service initialized successfully!")
         except Exception as e:
@@ -57,6 +99,14 @@ async def startup_event():
         finally:
             is_initializing = False
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    if classification_service.embedding_batcher is not None:
+        await classification_service.embedding_batcher.stop()
+    await classification_service.stop_pool_sync()
+    classification_service.stop_workers()
+
 @app.get("/", response_model=HealthResponse)
 async def root():
     """Health check endpoint"""
@@ -71,9 +121,22 @@ async def health_check():
     """Detailed health check"""
     global initialization_complete, is_initializing
     
+    methods = classification_service.method_status
     if initialization_complete:
-        status = "ready"
-        message = "Service is ready to accept requests"
+        ready = [method for method, state in methods.items() if state == 'ready']
+        pending = [method for method, state in methods.items() if state in ('pending', 'warming')]
+        failed = [method for method, state in methods.items() if state == 'failed']
+        if pending or failed:
+            # Ready methods are served while the others warm up
+            status = "warming" if pending else "degraded"
+            message = f"Serving {', '.join(ready) or 'no methods'}"
+            if pending:
+                message += f"; warming {', '.join(pending)}"
+            if failed:
+                message += f"; failed {', '.join(failed)}"
+        else:
+            status = "ready"
+            message = "Service is ready to accept requests"
     elif is_initializing:
         status = "initializing"
         message = "Service is still initializing, please wait..."
@@ -81,10 +144,27 @@ async def health_check():
         status = "not_ready"
         message = "Service initialization failed or not started"
     
+    # With several serving workers, the pool is ready only once every worker is
+    pool = classification_service.get_pool_status()
+    if pool is not None and status == "ready" and not pool['ready']:
+        status = "warming"
+        message = f"{pool['ready_workers']}/{pool['expected_workers']} workers ready"
+        if len(pool['generations']) > 1:
+            message += f"; workers are switching between generations {', '.join(pool['generations'])}"
+    
     return HealthResponse(
         status=status,
         message=message,
-        timestamp=datetime.now().isoformat()
+        timestamp=datetime.now().isoformat(),
+        methods=methods,
+        pool=pool
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics in text exposition format"""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
     )
 
 @app.get("/status", response_model=TrainingStatus)
@@ -95,9 +175,8 @@ async def get_status():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/classify", response_model=ClassificationResponse)
-async def classify_text(request: ClassificationRequest):
-    """Classify publication abstract"""
+def validate_classification_request(vectorization_method: str, model_name: str = None):
+    """Check that the service is ready and the requested method/model exist"""
     global initialization_complete
     
     if not initialization_complete:
@@ -107,32 +186,221 @@ async def classify_text(request: ClassificationRequest):
         )
     
     # Validate vectorization method
-    valid_methods = ['bow', 'tfidf', 'embeddings']
-    if request.vectorization_method not in valid_methods:
+    valid_methods = ['bow', 'tfidf', 'hashing', 'embeddings', 'cascade']
+    if vectorization_method not in valid_methods:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid vectorization method. Must be one of: {valid_methods}"
         )
     
+    # Only methods that have finished loading are served
+    method_status = classification_service.get_method_status(vectorization_method)
+    if method_status == 'disabled':
+        raise HTTPException(
+            status_code=400,
+            detail=f"Vectorization method {vectorization_method} is disabled"
+        )
+    if method_status != 'ready':
+        raise HTTPException(
+            status_code=503,
+            detail=f"Vectorization method {vectorization_method} is {method_status}, please try again shortly"
+        )
+    
     # Validate model name if provided
     valid_models = ['kmeans', 'knn', 'decision_tree', 'naive_bayes']
-    if request.model_name and request.model_name not in valid_models:
+    if model_name and model_name not in valid_models:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid model name. Must be one of: {valid_models}"
         )
+    # The cascade threshold is calibrated for one gate model and one escalation model
+    if model_name and vectorization_method == 'cascade':
+        raise HTTPException(
+            status_code=400,
+            detail="Cascade mode answers with CASCADE_GATE_MODEL or CASCADE_ESCALATION_MODEL; omit model_name"
+        )
+
+def request_deadline(timeout_ms: Optional[float]) -> Optional[float]:
+    """Absolute time.time() deadline of a request, from its timeout or REQUEST_TIMEOUT_MS"""
+    timeout_ms = timeout_ms or settings.request_timeout_ms
+    return time.time() + timeout_ms / 1000 if timeout_ms else None
+
+def admit(vectorization_method: str, lane: str, deadline: Optional[float] = None, bounded: bool = True):
+    """Wait for a slot of the method in the given lane, unless admission control is off"""
+    if classification_service.admission is None:
+        return nullcontext()
+    return classification_service.admission.admit(vectorization_method, lane, deadline, bounded)
+
+def overload_exception(e: Exception, vectorization_method: str) -> HTTPException:
+    """429 when the method's queue is full, 503 when the request can't be served in time"""
+    if isinstance(e, OverloadedError):
+        return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    retry_after = 1
+    if classification_service.admission is not None:
+        retry_after = classification_service.admission.retry_after(vectorization_method)
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(retry_after)})
+
+@app.post("/classify", response_model=ClassificationResponse)
+async def classify_text(request: ClassificationRequest):
+    """Classify publication abstract"""
+    validate_classification_request(request.vectorization_method, request.model_name)
     
+    deadline = request_deadline(request.timeout_ms)
     try:
-        result = classification_service.classify_text(
-            text=request.text,
-            vectorization_method=request.vectorization_method,
-            model_name=request.model_name
-        )
+        async with admit(request.vectorization_method, 'interactive', deadline):
+            result = await classification_service.classify_text_async(
+                text=request.text,
+                vectorization_method=request.vectorization_method,
+                model_name=request.model_name,
+                use_cache=request.use_cache,
+                deadline=deadline
+            )
         return result
+    except (OverloadedError, DeadlineExceededError, QueueFullError) as e:
+        raise overload_exception(e, request.vectorization_method)
     except Exception as e:
         logger.error(f"Classification error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/classify/batch", response_model=BatchClassificationResponse)
+async def classify_batch(request: BatchClassificationRequest):
+    """Classify many publication abstracts in one request"""
+    validate_classification_request(request.vectorization_method, request.model_name)
+    
+    if len(request.texts) > settings.max_batch_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large. At most {settings.max_batch_size} texts per request"
+        )
+    
+    deadline = request_deadline(request.timeout_ms)
+    try:
+        async with admit(request.vectorization_method, 'bulk', deadline):
+            result = await classification_service.classify_batch_async(
+                texts=request.texts,
+                vectorization_method=request.vectorization_method,
+                model_name=request.model_name,
+                deadline=deadline
+            )
+        return result
+    except (OverloadedError, DeadlineExceededError) as e:
+        raise overload_exception(e, request.vectorization_method)
+    except Exception as e:
+        logger.error(f"Batch classification error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/classify/bulk")
+async def classify_bulk(
+    file: UploadFile = File(...),
+    vectorization_method: str = Form('embeddings'),
+    model_name: Optional[str] = Form(None),
+    input_format: Optional[str] = Form(None),
+    include_text: bool = Form(False),
+    chunk_size: Optional[int] = Form(None)
+):
+    """
+    Classify an uploaded JSONL or CSV corpus (a `text` or `abstract` field per record)
+    and stream one NDJSON result line per record as chunks are processed
+    """
+    validate_classification_request(vectorization_method, model_name)
+    
+    input_format = input_format or detect_format(file.filename)
+    if input_format not in INPUT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid input format. Must be one of: {INPUT_FORMATS}"
+        )
+    chunk_size = min(chunk_size or settings.bulk_chunk_size, settings.max_batch_size)
+    
+    async def stream_results():
+        # The upload is spooled to disk, so only one chunk is held in memory at a time
+        text_stream = io.TextIOWrapper(file.file, encoding='utf-8', errors='replace', newline='')
+        try:
+            for chunk in iter_chunks(iter_records(text_stream, input_format), chunk_size):
+                texts = texts_to_classify(chunk)
+                response = None
+                if texts:
+                    # The response is already streaming, so chunks wait for a slot rather than fail
+                    async with admit(vectorization_method, 'bulk', bounded=False):
+                        response = await classification_service.classify_batch_async(
+                            texts=texts,
+                            vectorization_method=vectorization_method,
+                            model_name=model_name
+                        )
+                yield format_chunk(chunk, response, include_text)
+        except Exception as e:
+            logger.error(f"Bulk classification error: {str(e)}")
+            yield json.dumps({'error': str(e)}) + '\n'
+        finally:
+            text_stream.detach()
+            await file.close()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.post("/train/incremental", response_model=IncrementalTrainingResponse)
+async def train_incremental(request: IncrementalTrainingRequest):
+    """Add labeled abstracts to the trained models without a full retrain"""
+    global initialization_complete
+    
+    if not initialization_complete:
+        raise HTTPException(
+            status_code=503,
+            detail="Service is still initializing, please wait and try again"
+        )
+    
+    if classification_service.inference_executor.kind == 'process':
+        # Process workers hold their own copies of the models
+        raise HTTPException(
+            status_code=409,
+            detail="Incremental training requires INFERENCE_EXECUTOR=thread"
+        )
+    
+    if len(request.texts) > settings.max_batch_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large. At most {settings.max_batch_size} texts per request"
+        )
+    
+    try:
+        return await classification_service.inference_executor.run(
+            classification_service.train_incremental,
+            texts=request.texts,
+            labels=request.labels,
+            methods=request.methods,
+            persist=request.persist
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Incremental training error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/train/retrain", status_code=202)
+async def retrain(request: Optional[RetrainRequest] = None):
+    """
+    Retrain every model in the background and swap the new generation in
+    atomically; requests keep being served by the current one meanwhile
+    """
+    global initialization_complete
+    
+    if not initialization_complete:
+        raise HTTPException(
+            status_code=503,
+            detail="Service is still initializing, please wait and try again"
+        )
+    
+    sample_size = (request.sample_size if request else None) or settings.sample_size
+    try:
+        classification_service.start_retrain(sample_size)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return {
+        "message": "Retraining started in background",
+        "generation_id": classification_service.generation.generation_id,
+        "sample_size": sample_size
+    }
+
 @app.post("/initialize")
 async def initialize_service(background_tasks: BackgroundTasks):
     """Manually trigger service initialization"""
@@ -148,7 +416,9 @@ async def initialize_service(background_tasks: BackgroundTasks):
         global is_initializing, initialization_complete
         is_initializing = True
         try:
-            await classification_service.initialize(sample_size=1000)
+            await classification_service.initialize(sample_size=settings.sample_size)
+            classification_service.start_workers(sample_size=settings.sample_size)
+            classification_service.start_pool_sync()
             initialization_complete = True
             logger.info("Manual initialization completed successfully!")
         except Exception as e:
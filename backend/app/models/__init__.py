@@ -3,4 +3,5 @@ Machine learning models and vectorizers
 """
 
 from .classification_models import ClassificationModelManager
-from .vectorizers import VectorizerManager
\ No newline at end of file
+from .vectorizers import VectorizerManager
+from .ann_index import IVFKNeighborsClassifier
\ No newline at end of file
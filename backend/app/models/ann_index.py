@@ -0,0 +1,137 @@
+import numpy as np
+from typing import Optional
+
+
+class IVFKNeighborsClassifier:
+    """
+    Approximate k-nearest-neighbours classifier on L2-normalized vectors.
+
+    Training vectors are partitioned into n_lists clusters (an inverted file
+    index). A query only scans the n_probe lists whose centroids are closest,
+    so raising n_probe trades latency for recall; n_probe == n_lists is an
+    exact search. On unit vectors, Euclidean and cosine neighbours coincide,
+    so results match KNeighborsClassifier(n_neighbors=k) at full recall.
+    """
+
+    def __init__(
+        self,
+        n_neighbors: int = 5,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        n_iter: int = 20,
+        random_state: int = 42
+    ):
+        self.n_neighbors = n_neighbors
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.random_state = random_state
+
+    def _train_centroids(self, X: np.ndarray, n_lists: int) -> np.ndarray:
+        """Spherical k-means with NumPy"""
+        rng = np.random.RandomState(self.random_state)
+        centroids = X[rng.choice(len(X), n_lists, replace=False)].copy()
+
+        for _ in range(self.n_iter):
+            assignments = np.argmax(X @ centroids.T, axis=1)
+            for list_id in range(n_lists):
+                members = X[assignments == list_id]
+                if len(members) == 0:
+                    # Re-seed empty lists with a random training vector
+                    centroids[list_id] = X[rng.randint(len(X))]
+                else:
+                    centroids[list_id] = members.mean(axis=0)
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids /= np.maximum(norms, 1e-12)
+
+        return centroids
+
+    def fit(self, X, y):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.asarray(y)
+
+        self.classes_, y_encoded = np.unique(y, return_inverse=True)
+
+        n_lists = self.n_lists or int(np.sqrt(len(X)))
+        n_lists = int(min(max(1, n_lists), len(X)))
+        self.centroids_ = self._train_centroids(X, n_lists).astype(np.float32)
+
+        # Store vectors grouped by list so each list is one contiguous slice
+        assignments = np.argmax(X @ self.centroids_.T, axis=1)
+        order = np.argsort(assignments, kind='stable')
+        self.vectors_ = X[order]
+        self.labels_ = y_encoded[order].astype(np.int32)
+        self.offsets_ = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        # Vectors added by partial_fit, kept per list next to the fitted slices
+        self.added_vectors_ = [np.empty((0, X.shape[1]), dtype=np.float32)] * n_lists
+        self.added_labels_ = [np.empty(0, dtype=np.int32)] * n_lists
+        return self
+
+    def partial_fit(self, X, y):
+        """
+        Add labeled vectors to their nearest lists without retraining the
+        centroids. Only the lists that receive vectors are extended, so an
+        update costs O(batch + those lists' added vectors), not O(corpus).
+        Attributes are replaced rather than modified, so a shallow copy can be
+        updated while the original keeps serving queries.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.asarray(y)
+
+        # New classes go at the end, so the stored encoded labels stay valid
+        new_classes = np.setdiff1d(np.unique(y), self.classes_)
+        classes = np.concatenate([self.classes_, new_classes]) if len(new_classes) else self.classes_
+        index = {label: i for i, label in enumerate(classes.tolist())}
+        y_encoded = np.array([index[label] for label in y.tolist()], dtype=np.int32)
+
+        assignments = np.argmax(X @ self.centroids_.T, axis=1)
+        added_vectors = list(self.added_vectors_)
+        added_labels = list(self.added_labels_)
+        for list_id in np.unique(assignments):
+            members = assignments == list_id
+            added_vectors[list_id] = np.concatenate([added_vectors[list_id], X[members]])
+            added_labels[list_id] = np.concatenate([added_labels[list_id], y_encoded[members]])
+
+        self.classes_ = classes
+        self.added_vectors_ = added_vectors
+        self.added_labels_ = added_labels
+        return self
+
+    def _search(self, query: np.ndarray, centroid_scores: np.ndarray) -> np.ndarray:
+        """Return encoded labels of the approximate nearest neighbours of one query"""
+        n_probe = min(self.n_probe, len(centroid_scores))
+        probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+
+        # Lists are contiguous slices, so scoring them needs no gather copy
+        scores, labels = [], []
+        for list_id in probe:
+            start, end = self.offsets_[list_id], self.offsets_[list_id + 1]
+            if start < end:
+                scores.append(self.vectors_[start:end] @ query)
+                labels.append(self.labels_[start:end])
+            if len(self.added_labels_[list_id]):
+                scores.append(self.added_vectors_[list_id] @ query)
+                labels.append(self.added_labels_[list_id])
+        if not scores:
+            return np.empty(0, dtype=np.int32)
+        scores = np.concatenate(scores)
+        labels = np.concatenate(labels)
+
+        k = min(self.n_neighbors, len(scores))
+        nearest = np.argpartition(-scores, k - 1)[:k]
+        return labels[nearest]
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        centroid_scores = X @ self.centroids_.T
+
+        probas = np.zeros((len(X), len(self.classes_)))
+        for i in range(len(X)):
+            neighbour_labels = self._search(X[i], centroid_scores[i])
+            if len(neighbour_labels):
+                counts = np.bincount(neighbour_labels, minlength=len(self.classes_))
+                probas[i] = counts / len(neighbour_labels)
+        return probas
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
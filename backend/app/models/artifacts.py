@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import joblib
+import sklearn
+
+# Bump whenever the on-disk layout or the pickled state structure changes
+ARTIFACT_FORMAT_VERSION = 6
+
+MANIFEST_FILE = 'manifest.json'
+VECTORIZERS_FILE = 'vectorizers.joblib'
+# Models are stored per vectorization method so each can be loaded on its own
+MODELS_FILE_TEMPLATE = 'models_{method}.joblib'
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest(directory: str) -> Optional[Dict]:
+    """Read the bundle manifest, or return None if there is no bundle"""
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def get_stale_reason(manifest: Optional[Dict], training_config: Dict) -> Optional[str]:
+    """Return why a bundle can't be used for this config, or None if it is current"""
+    if manifest is None:
+        return "no artifact bundle found"
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        return f"format version {manifest.get('format_version')} != {ARTIFACT_FORMAT_VERSION}"
+    if manifest.get('sklearn_version') != sklearn.__version__:
+        return f"built with scikit-learn {manifest.get('sklearn_version')}, running {sklearn.__version__}"
+    if manifest.get('training_config') != training_config:
+        return "training configuration changed"
+    return None
+
+
+def save_bundle(directory: str, vectorizer_manager, model_manager, training_config: Dict, generation_id: Optional[str] = None) -> Dict:
+    """
+    Save fitted vectorizers and trained models as a versioned bundle.
+    The bundle is written to a temporary directory and moved into place,
+    so a crash mid-save never leaves a half-written bundle behind.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    joblib.dump(vectorizer_manager.get_state(), os.path.join(tmp_dir, VECTORIZERS_FILE))
+    names = [VECTORIZERS_FILE]
+    for method in vectorizer_manager.methods:
+        name = MODELS_FILE_TEMPLATE.format(method=method)
+        joblib.dump(model_manager.get_state(method), os.path.join(tmp_dir, name))
+        names.append(name)
+
+    files = {}
+    for name in names:
+        path = os.path.join(tmp_dir, name)
+        files[name] = {'sha256': _sha256(path), 'size': os.path.getsize(path)}
+
+    bundle_id = hashlib.sha256(
+        ''.join(files[name]['sha256'] for name in sorted(files)).encode('utf-8')
+    ).hexdigest()[:12]
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'bundle_id': bundle_id,
+        'generation_id': generation_id or bundle_id,
+        'created_at': datetime.now().isoformat(),
+        'sklearn_version': sklearn.__version__,
+        'training_config': training_config,
+        'methods': list(vectorizer_manager.methods),
+        'models': sorted(model_manager.get_state()['is_trained'].keys()),
+        'files': files
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap the new bundle into place
+    old_dir = f"{directory}.old-{os.getpid()}"
+    if os.path.exists(directory):
+        os.rename(directory, old_dir)
+    os.rename(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    return manifest
+
+
+def load_bundle(directory: str, vectorizer_manager, model_manager, training_config: Dict, methods: Optional[List[str]] = None, mmap_mode: Optional[str] = None) -> Dict:
+    """
+    Load a bundle into the given managers and return its manifest.
+    Only the models of the requested methods (default: the vectorizer
+    manager's enabled methods) are read. With mmap_mode='r', numpy arrays
+    (KNN reference sets, centroids, idf weights) are memory-mapped from the
+    bundle files, so every process that loads the bundle shares one copy.
+    Raises ValueError if the bundle is missing, stale or corrupted.
+    """
+    manifest = read_manifest(directory)
+    stale_reason = get_stale_reason(manifest, training_config)
+    if stale_reason:
+        raise ValueError(f"Artifact bundle is not usable: {stale_reason}")
+
+    methods = list(methods or vectorizer_manager.methods)
+    missing = [method for method in methods if method not in manifest.get('methods', [])]
+    if missing:
+        raise ValueError(f"Artifact bundle is not usable: no models for {', '.join(missing)}")
+
+    names = [VECTORIZERS_FILE] + [MODELS_FILE_TEMPLATE.format(method=method) for method in methods]
+    for name in names:
+        info = manifest['files'].get(name)
+        if info is None:
+            raise ValueError(f"Artifact bundle is missing {name}")
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            raise ValueError(f"Artifact bundle is missing {name}")
+        if _sha256(path) != info['sha256']:
+            raise ValueError(f"Checksum mismatch for {name}")
+
+    # Only touch the managers once every file has been verified
+    vectorizer_state = joblib.load(os.path.join(directory, VECTORIZERS_FILE), mmap_mode=mmap_mode)
+    model_states = [
+        joblib.load(os.path.join(directory, MODELS_FILE_TEMPLATE.format(method=method)), mmap_mode=mmap_mode)
+        for method in methods
+    ]
+    vectorizer_manager.load_state(vectorizer_state)
+    for model_state in model_states:
+        model_manager.load_state(model_state)
+
+    return manifest
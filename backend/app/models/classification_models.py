@@ -1,48 +1,170 @@
+import copy
+import threading
+import time
 import numpy as np
-from collections import Counter
-from typing import Dict, List, Tuple
-from sklearn.cluster import KMeans
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.naive_bayes import GaussianNB
+from typing import Dict, List, Optional, Tuple
+from scipy import sparse
+
+from app.config import settings
+from app.utils.memory import deep_nbytes
+from app.utils.metrics import MODEL_PREDICT_DURATION
+from .ann_index import IVFKNeighborsClassifier
+from .incremental_knn import BufferedKNeighborsClassifier
+
+# Vectorization methods that produce sparse, non-negative feature matrices
+SPARSE_METHODS = ('bow', 'tfidf', 'hashing')
+
+def prepare_input(X, model):
+    """Densify sparse features only for estimators that can't consume them"""
+    if sparse.issparse(X):
+        from sklearn.naive_bayes import GaussianNB
+        if isinstance(model, GaussianNB):
+            return X.toarray()
+    return X
+
+def count_cluster_labels(cluster_ids: np.ndarray, y: np.ndarray, n_clusters: int, n_labels: int) -> np.ndarray:
+    """Matrix of how many samples of each label fell into each cluster"""
+    counts = np.zeros((n_clusters, n_labels), dtype=np.int64)
+    np.add.at(counts, (np.asarray(cluster_ids), np.asarray(y)), 1)
+    return counts
+
+def fit_model(model_name: str, model, X_train, y_train: List[int]):
+    """
+    Fit one estimator and return it with its cluster/label count matrix
+    (None for anything but KMeans). Module-level so it can run in worker processes.
+    """
+    X_train = prepare_input(X_train, model)
+    
+    if model_name.startswith('kmeans'):
+        # KMeans requires special handling for labels: each cluster maps to its most common label
+        cluster_ids = model.fit_predict(X_train)
+        y_train = np.asarray(y_train)
+        return model, count_cluster_labels(cluster_ids, y_train, model.n_clusters, int(y_train.max()) + 1)
+    
+    model.fit(X_train, y_train)
+    return model, None
 
 class ClassificationModelManager:
     def __init__(self, label_to_id: Dict[str, int], id_to_label: Dict[int, str]):
         self.label_to_id = label_to_id
         self.id_to_label = id_to_label
+        # Estimators are created per {model}_{method} key when trained or loaded
         self.models = {}
         self.is_trained = {}
         
-        # Initialize models
-        self.models['kmeans'] = KMeans(n_clusters=len(label_to_id), random_state=42)
-        self.models['knn'] = KNeighborsClassifier(n_neighbors=5)
-        self.models['decision_tree'] = DecisionTreeClassifier(random_state=42)
-        self.models['naive_bayes'] = GaussianNB()
-        
-        self.cluster_to_label = {}  # For KMeans
+        self.cluster_to_label = {}  # For KMeans, keyed by model name
+        self.cluster_label_counts = {}  # For KMeans: samples per (cluster, label)
+        self.fit_times = {}  # Seconds spent fitting each model
+        self._update_lock = threading.Lock()  # Serializes incremental updates
+
+    def create_model(self, model_name: str, method: str = None):
+        """
+        Create an untrained estimator suited to the given vectorization method.
+        Each model family's scikit-learn module is imported on first use.
+        """
+        if model_name == 'kmeans':
+            from sklearn.cluster import KMeans
+            return KMeans(n_clusters=len(self.label_to_id), random_state=42)
+        elif model_name == 'knn':
+            if method == 'embeddings' and settings.knn_index == 'ivf':
+                # Approximate search over the normalized embedding vectors
+                return IVFKNeighborsClassifier(
+                    n_neighbors=5,
+                    n_lists=settings.knn_ivf_lists,
+                    n_probe=settings.knn_ivf_probe
+                )
+            from sklearn.neighbors import KNeighborsClassifier
+            return KNeighborsClassifier(n_neighbors=5)
+        elif model_name == 'decision_tree':
+            from sklearn.tree import DecisionTreeClassifier
+            return DecisionTreeClassifier(random_state=42)
+        elif model_name == 'naive_bayes':
+            # GaussianNB needs dense input; counts and (idf-)weighted counts suit MultinomialNB
+            from sklearn.naive_bayes import GaussianNB, MultinomialNB
+            return MultinomialNB() if method in SPARSE_METHODS else GaussianNB()
+        else:
+            raise ValueError(f"Unknown model: {model_name}")
 
     def train_model(self, X_train: np.ndarray, y_train: List[int], model_name: str):
         """Train a specific model"""
         if model_name not in self.models:
             raise ValueError(f"Unknown model: {model_name}")
         
-        model = self.models[model_name]
-        
-        if model_name == 'kmeans':
-            # KMeans requires special handling for labels
-            cluster_ids = model.fit_predict(X_train)
-            
-            # Assign most common label to each cluster
-            self.cluster_to_label = {}
-            for cluster_id in set(cluster_ids):
-                labels_in_cluster = [y_train[i] for i in range(len(y_train)) if cluster_ids[i] == cluster_id]
-                most_common_label = Counter(labels_in_cluster).most_common(1)[0][0]
-                self.cluster_to_label[cluster_id] = most_common_label
-        else:
-            model.fit(X_train, y_train)
-        
+        start_time = time.perf_counter()
+        model, cluster_label_counts = fit_model(model_name, self.models[model_name], X_train, y_train)
+        self.set_trained_model(model_name, model, cluster_label_counts, time.perf_counter() - start_time)
+
+    def set_trained_model(self, model_name: str, model, cluster_label_counts: np.ndarray = None, fit_time: float = None):
+        """Register an estimator that was fitted elsewhere, e.g. in a worker process"""
+        if cluster_label_counts is not None:
+            self._set_cluster_label_counts(model_name, cluster_label_counts)
+        self.models[model_name] = model
+        if fit_time is not None:
+            self.fit_times[model_name] = fit_time
         self.is_trained[model_name] = True
 
+    def _set_cluster_label_counts(self, model_name: str, counts: np.ndarray):
+        # Empty clusters get no label, as before
+        self.cluster_label_counts[model_name] = counts
+        self.cluster_to_label[model_name] = {
+            int(cluster_id): int(np.argmax(counts[cluster_id]))
+            for cluster_id in np.flatnonzero(counts.sum(axis=1))
+        }
+
+    def partial_update(self, model_name: str, X, y: List[int]) -> str:
+        """
+        Update a trained model with a batch of new labeled samples in O(batch)
+        where the model allows it. The updated estimator is built on a copy
+        and swapped in, so concurrent predictions never see a half-updated model.
+        Returns 'updated' or the reason the model was skipped.
+        """
+        if not self.is_trained.get(model_name, False):
+            raise ValueError(f"Model {model_name} is not trained")
+
+        y = np.asarray(y)
+        with self._update_lock:
+            model = self.models[model_name]
+            X = prepare_input(X, model)
+            base_model_name = model_name.rpartition('_')[0]
+
+            if base_model_name == 'naive_bayes':
+                updated = copy.deepcopy(model)
+                updated.partial_fit(X, y)
+            elif base_model_name == 'kmeans':
+                updated = self._update_kmeans(model_name, model, X, y)
+            elif base_model_name == 'knn':
+                if isinstance(model, (IVFKNeighborsClassifier, BufferedKNeighborsClassifier)):
+                    updated = copy.copy(model).partial_fit(X, y)
+                else:
+                    # Keep the fitted model as is and search appended samples next to it
+                    updated = BufferedKNeighborsClassifier(model).partial_fit(X, y)
+            else:
+                return "skipped: no incremental update, refreshed by the next full retrain"
+
+            self.models[model_name] = updated
+            return 'updated'
+
+    def _update_kmeans(self, model_name: str, model, X, y: np.ndarray):
+        """Mini-batch step: move each centroid to the running mean of its members"""
+        cluster_ids = model.predict(X)
+        counts = self.cluster_label_counts[model_name]
+        if y.max() >= counts.shape[1]:
+            counts = np.pad(counts, ((0, 0), (0, int(y.max()) + 1 - counts.shape[1])))
+        batch_counts = count_cluster_labels(cluster_ids, y, counts.shape[0], counts.shape[1])
+
+        centers = model.cluster_centers_.copy()
+        sizes = counts.sum(axis=1)
+        for cluster_id in np.unique(cluster_ids):
+            members = X[cluster_ids == cluster_id]
+            batch_size = members.shape[0]
+            batch_sum = np.asarray(members.sum(axis=0)).ravel()
+            centers[cluster_id] += (batch_sum - batch_size * centers[cluster_id]) / (sizes[cluster_id] + batch_size)
+
+        updated = copy.copy(model)
+        updated.cluster_centers_ = centers
+        self._set_cluster_label_counts(model_name, counts + batch_counts)
+        return updated
+
     def predict(self, X: np.ndarray, model_name: str) -> Tuple[List[int], List[float]]:
         """Make predictions with a specific model"""
         if model_name not in self.models:
@@ -52,10 +174,13 @@ class ClassificationModelManager:
             raise ValueError(f"Model {model_name} is not trained")
         
         model = self.models[model_name]
+        start_time = time.perf_counter()
+        X = prepare_input(X, model)
         
-        if model_name == 'kmeans':
+        if model_name.startswith('kmeans'):
             cluster_ids = model.predict(X)
-            predictions = [self.cluster_to_label[cluster_id] for cluster_id in cluster_ids]
+            cluster_to_label = self.cluster_to_label[model_name]
+            predictions = [cluster_to_label[int(cluster_id)] for cluster_id in cluster_ids]
             # For KMeans, we don't have confidence scores, so we use dummy values
             confidences = [0.5] * len(predictions)  # Placeholder
         else:
@@ -68,6 +193,13 @@ class ClassificationModelManager:
             else:
                 confidences = [1.0] * len(predictions)  # Placeholder for models without proba
         
+        base_model_name, _, method = model_name.rpartition('_')
+        MODEL_PREDICT_DURATION.observe(
+            time.perf_counter() - start_time,
+            model=base_model_name or model_name,
+            method=method if base_model_name else ''
+        )
+        
         return predictions, confidences
 
     def predict_single(self, X: np.ndarray, model_name: str) -> Tuple[str, float]:
@@ -83,6 +215,11 @@ class ClassificationModelManager:
         
         return pred_label, confidence
 
+    def predict_labels(self, X: np.ndarray, model_name: str) -> Tuple[List[str], List[float]]:
+        """Predict every row of X and return label names and confidences"""
+        predictions, confidences = self.predict(X, model_name)
+        return [self.id_to_label[pred_id] for pred_id in predictions], confidences
+
     def get_all_predictions(self, X: np.ndarray) -> Dict[str, Dict]:
         """Get predictions from all trained models"""
         results = {}
@@ -106,4 +243,61 @@ class ClassificationModelManager:
 
     def get_model_status(self) -> Dict[str, bool]:
         """Get training status of all models"""
-        return self.is_trained.copy()
\ No newline at end of file
+        return self.is_trained.copy()
+
+    def get_memory_usage(self, seen: Optional[set] = None) -> Dict[str, int]:
+        """In-memory size in bytes of each trained model; buffers already in `seen` are not counted again"""
+        seen = set() if seen is None else seen
+        return {
+            f"model_{name}": deep_nbytes(self.models[name], seen) + deep_nbytes(self.cluster_label_counts.get(name), seen)
+            for name in self.models if self.is_trained.get(name, False)
+        }
+
+    def copy(self) -> 'ClassificationModelManager':
+        """
+        A manager sharing this one's estimators, for building a new generation.
+        partial_update replaces estimators rather than mutating them, so updating
+        the copy leaves this manager untouched.
+        """
+        clone = ClassificationModelManager(self.label_to_id, self.id_to_label)
+        clone.models = dict(self.models)
+        clone.is_trained = dict(self.is_trained)
+        clone.cluster_to_label = dict(self.cluster_to_label)
+        clone.cluster_label_counts = dict(self.cluster_label_counts)
+        clone.fit_times = dict(self.fit_times)
+        return clone
+
+    def set_knn_n_probe(self, n_probe: int):
+        """Adjust the recall/latency trade-off of IVF-backed KNN models"""
+        for model in self.models.values():
+            if isinstance(model, IVFKNeighborsClassifier):
+                model.n_probe = n_probe
+
+    def get_state(self, method: Optional[str] = None) -> Dict:
+        """Get the fitted state of trained models for persistence, optionally for one vectorization method"""
+        trained = [
+            name for name in self.models
+            if self.is_trained.get(name, False) and (method is None or name.endswith(f"_{method}"))
+        ]
+        return {
+            'label_to_id': self.label_to_id,
+            'id_to_label': self.id_to_label,
+            'models': {name: self.models[name] for name in trained},
+            'is_trained': {name: True for name in trained},
+            'cluster_label_counts': {
+                name: self.cluster_label_counts[name] for name in trained if name in self.cluster_label_counts
+            },
+            'fit_times': {name: self.fit_times[name] for name in trained if name in self.fit_times}
+        }
+
+    def load_state(self, state: Dict):
+        """Restore models from a state produced by get_state()"""
+        if state['label_to_id'] != self.label_to_id:
+            raise ValueError("Saved models were trained on a different label set")
+
+        # States for different methods are merged, so each can be loaded on its own
+        self.models.update(state['models'])
+        self.is_trained.update(state['is_trained'])
+        for name, counts in state['cluster_label_counts'].items():
+            self._set_cluster_label_counts(name, counts)
+        self.fit_times.update(state.get('fit_times', {}))
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Inference backends for the sentence-transformers encoder.
+
+- torch: fp32 eager PyTorch (the baseline)
+- int8: PyTorch with dynamic int8 quantization of every nn.Linear layer
+- onnx: the model exported to ONNX and run by onnxruntime
+- onnx-int8: the ONNX export with dynamically quantized int8 weights
+
+The ONNX backends need `optimum[onnxruntime]`. Exports are written once
+under MODEL_CACHE_DIR and reused on later starts.
+"""
+
+import os
+import re
+from typing import Dict
+
+import numpy as np
+
+from app.config import settings
+
+EMBEDDING_BACKENDS = ['torch', 'int8', 'onnx', 'onnx-int8']
+
+
+def _onnx_export_dir(model_name: str) -> str:
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+    return os.path.join(settings.model_cache_dir, 'onnx', safe_name)
+
+
+def _quantization_config() -> str:
+    """Pick the int8 kernel flavour onnxruntime should target on this CPU"""
+    import platform
+    if platform.machine().lower() in ('arm64', 'aarch64'):
+        return 'arm64'
+    return settings.onnx_quantization
+
+
+def _load_onnx(model_name: str, quantized: bool):
+    from sentence_transformers import SentenceTransformer
+
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        raise ValueError("The onnx embedding backends need optimum[onnxruntime] installed")
+
+    export_dir = _onnx_export_dir(model_name)
+    if not os.path.isfile(os.path.join(export_dir, 'onnx', 'model.onnx')):
+        print(f"Exporting {model_name} to ONNX in {export_dir}...")
+        SentenceTransformer(model_name, backend='onnx', device='cpu').save(export_dir)
+
+    if not quantized:
+        return SentenceTransformer(export_dir, backend='onnx', device='cpu')
+
+    config = _quantization_config()
+    file_name = f"model_qint8_{config}.onnx"
+    if not os.path.isfile(os.path.join(export_dir, 'onnx', file_name)):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        print(f"Quantizing the ONNX export of {model_name} ({config})...")
+        export_dynamic_quantized_onnx_model(
+            SentenceTransformer(export_dir, backend='onnx', device='cpu'),
+            quantization_config=config,
+            model_name_or_path=export_dir
+        )
+    return SentenceTransformer(
+        export_dir, backend='onnx', device='cpu', model_kwargs={'file_name': f"onnx/{file_name}"}
+    )
+
+
+def load_encoder(model_name: str, backend: str = 'torch'):
+    """Load a SentenceTransformer running on the given inference backend"""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}. Must be one of: {EMBEDDING_BACKENDS}")
+
+    from sentence_transformers import SentenceTransformer
+
+    if backend == 'torch':
+        return SentenceTransformer(model_name)
+    elif backend == 'int8':
+        import torch
+        model = SentenceTransformer(model_name, device='cpu')
+        # Weights are stored as int8; activations are quantized on the fly per batch
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend == 'onnx':
+        return _load_onnx(model_name, quantized=False)
+    else:
+        return _load_onnx(model_name, quantized=True)
+
+
+def compare_embeddings(baseline: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Cosine similarity between matching rows of two embedding matrices"""
+    baseline = np.asarray(baseline, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    if baseline.shape != candidate.shape:
+        raise ValueError(f"Embedding shapes differ: {baseline.shape} vs {candidate.shape}")
+
+    norms = np.linalg.norm(baseline, axis=1) * np.linalg.norm(candidate, axis=1)
+    cosine = np.sum(baseline * candidate, axis=1) / np.maximum(norms, 1e-12)
+    return {
+        'mean_cosine': float(cosine.mean()),
+        'min_cosine': float(cosine.min()),
+        'p01_cosine': float(np.percentile(cosine, 1)),
+        'max_abs_diff': float(np.abs(baseline - candidate).max())
+    }
@@ -0,0 +1,68 @@
+"""
+Padding-aware batching for the sentence-transformers encoder.
+
+A batch is padded to its longest input, so mixing short and long abstracts
+wastes most of the encoder's work on padding. Inputs are sorted by token
+length and cut into batches bounded both by a number of texts and by a
+budget of padded tokens: short abstracts go in large batches, long ones in
+small ones. Abstracts over the encoder's limit can be split into
+overlapping token windows whose embeddings are averaged, instead of being
+truncated.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+
+def plan_batches(lengths: List[int], batch_size: int, max_batch_tokens: int = 0) -> List[np.ndarray]:
+    """
+    Group input indices into batches of similar token length, longest first.
+    A batch holds at most batch_size inputs and, if max_batch_tokens is set,
+    at most max_batch_tokens tokens once padded to its longest input.
+    """
+    order = np.argsort(-np.asarray(lengths), kind='stable')
+    batches = []
+    start = 0
+    while start < len(order):
+        # Sorted longest first, so the first input sets the padded length
+        longest = max(int(lengths[order[start]]), 1)
+        size = batch_size
+        if max_batch_tokens:
+            size = max(1, min(batch_size, max_batch_tokens // longest))
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
+def padded_tokens(lengths: List[int], batches: List[np.ndarray]) -> int:
+    """Tokens the encoder processes for these batches, padding included"""
+    return sum(len(batch) * max(int(lengths[i]) for i in batch) for batch in batches)
+
+
+def token_windows(n_tokens: int, window: int, overlap: int) -> List[Tuple[int, int]]:
+    """(start, end) token spans of overlapping windows covering n_tokens"""
+    if not 0 <= overlap < window:
+        raise ValueError(f"Chunk overlap must be at least 0 and below the {window}-token window, got {overlap}")
+    if n_tokens <= window:
+        return [(0, n_tokens)]
+    step = window - overlap
+    spans = []
+    start = 0
+    while True:
+        end = min(start + window, n_tokens)
+        spans.append((start, end))
+        if end == n_tokens:
+            return spans
+        start += step
+
+
+def pool_chunks(vectors: np.ndarray, owners: List[int], weights: List[int], n_texts: int, normalize: bool) -> np.ndarray:
+    """Average the chunk embeddings of each text, weighted by chunk length"""
+    weights = np.asarray(weights, dtype=np.float32)
+    pooled = np.zeros((n_texts, vectors.shape[1]), dtype=np.float32)
+    np.add.at(pooled, owners, vectors * weights[:, None])
+    pooled /= np.bincount(owners, weights=weights, minlength=n_texts)[:, None].astype(np.float32)
+    if normalize:
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+    return pooled
@@ -0,0 +1,210 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+VECTORS_FILE = 'vectors.f32'
+KEYS_FILE = 'keys.txt'
+META_FILE = 'meta.json'
+LOCK_FILE = 'append.lock'
+# Each key is a sha256 hex digest on its own line
+KEY_LINE_BYTES = 65
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache for embedding vectors.
+
+    Vectors are keyed on a hash of (model name, mode prefix, normalized text)
+    and kept in two tiers: a bounded in-memory LRU and an optional append-only
+    on-disk store of float32 rows that is read through a memory map.
+    Several processes can share the on-disk store: appends hold a file lock
+    and each process picks up rows the others appended.
+    """
+
+    def __init__(self, max_items: int = 10000, cache_dir: Optional[str] = None, max_disk_items: int = 1000000):
+        self.max_items = max_items
+        self.cache_dir = cache_dir
+        self.max_disk_items = max_disk_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Disk tier state, created lazily per model since dimensions differ
+        self._disk = {}
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_name: str, mode: str, text: str) -> str:
+        """Hash the inputs that determine an embedding"""
+        payload = f"{model_name}\x00{mode}\x00{text.strip()}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _disk_dir(self, model_name: str) -> str:
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+        return os.path.join(self.cache_dir, safe_name)
+
+    def _open_disk(self, model_name: str) -> Optional[Dict]:
+        """Load the key index and memory map for a model's on-disk store"""
+        if not self.cache_dir:
+            return None
+        if model_name in self._disk:
+            return self._disk[model_name]
+
+        store = {'dir': self._disk_dir(model_name), 'dim': None, 'index': {}, 'rows': 0, 'vectors': None}
+        self._refresh_disk(store)
+        self._disk[model_name] = store
+        return store
+
+    def _refresh_disk(self, store: Dict):
+        """Index rows appended since the store was last read, possibly by another process"""
+        directory = store['dir']
+        if store['dim'] is None:
+            meta_path = os.path.join(directory, META_FILE)
+            if not os.path.isfile(meta_path):
+                return
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                store['dim'] = json.load(f)['dim']
+
+        keys_path = os.path.join(directory, KEYS_FILE)
+        try:
+            # A writer may be mid-line; only whole lines count
+            complete_rows = os.path.getsize(keys_path) // KEY_LINE_BYTES
+        except FileNotFoundError:
+            return
+        if complete_rows <= store['rows']:
+            return
+
+        with open(keys_path, 'r', encoding='utf-8') as f:
+            f.seek(store['rows'] * KEY_LINE_BYTES)
+            keys = f.read((complete_rows - store['rows']) * KEY_LINE_BYTES).split()
+
+        # Vectors are written before keys, so a crash can only leave extra rows
+        row_bytes = store['dim'] * 4
+        n_rows = min(store['rows'] + len(keys), os.path.getsize(os.path.join(directory, VECTORS_FILE)) // row_bytes)
+        for row in range(store['rows'], n_rows):
+            store['index'][keys[row - store['rows']]] = row
+        store['rows'] = n_rows
+        self._map_vectors(store, n_rows)
+
+    @contextmanager
+    def _append_lock(self, store: Dict):
+        """Serialize appends to a store across processes"""
+        os.makedirs(store['dir'], exist_ok=True)
+        with open(os.path.join(store['dir'], LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _map_vectors(self, store: Dict, n_rows: int):
+        if n_rows == 0:
+            store['vectors'] = None
+            return
+        store['vectors'] = np.memmap(
+            os.path.join(store['dir'], VECTORS_FILE),
+            dtype=np.float32,
+            mode='r',
+            shape=(n_rows, store['dim'])
+        )
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model_name: str, keys: List[str], remember: bool = True) -> List[Optional[np.ndarray]]:
+        """Look up vectors, returning None for every key that isn't cached; disk hits are kept in memory if remember"""
+        results = []
+        with self._lock:
+            store = self._open_disk(model_name)
+            if store is not None:
+                self._refresh_disk(store)
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                elif store is not None and key in store['index']:
+                    vector = np.array(store['vectors'][store['index'][key]])
+                    if remember:
+                        self._remember(key, vector)
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+                results.append(vector)
+        return results
+
+    def put_many(self, model_name: str, keys: List[str], vectors: np.ndarray, remember: bool = True):
+        """Store newly computed vectors on disk and, if remember, in memory"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if remember:
+                for key, vector in zip(keys, vectors):
+                    # Copy the row so one cached vector doesn't keep the whole batch alive
+                    self._remember(key, vector.copy())
+
+            store = self._open_disk(model_name)
+            if store is None:
+                return
+
+            with self._append_lock(store):
+                # Another process may have appended (or even created the store) meanwhile
+                self._refresh_disk(store)
+                new_rows = list({
+                    key: vector for key, vector in zip(keys, vectors)
+                    if key not in store['index']
+                }.items())
+                room = self.max_disk_items - store['rows']
+                new_rows = new_rows[:max(room, 0)]
+                if not new_rows:
+                    return
+
+                vectors_path = os.path.join(store['dir'], VECTORS_FILE)
+                if store['dim'] is None:
+                    store['dim'] = int(vectors.shape[1])
+                    open(os.path.join(store['dir'], KEYS_FILE), 'w').close()
+                    open(vectors_path, 'wb').close()
+                    # Readers treat the store as existing once the metadata appears
+                    meta_path = os.path.join(store['dir'], META_FILE)
+                    with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as f:
+                        json.dump({'dim': store['dim'], 'dtype': 'float32'}, f)
+                    os.replace(f"{meta_path}.tmp", meta_path)
+
+                # Drop rows a crashed writer left without keys, so row numbers stay aligned
+                row_bytes = store['dim'] * 4
+                if os.path.getsize(vectors_path) > store['rows'] * row_bytes:
+                    os.truncate(vectors_path, store['rows'] * row_bytes)
+
+                with open(vectors_path, 'ab') as f:
+                    f.write(np.stack([vector for _, vector in new_rows]).tobytes())
+                with open(os.path.join(store['dir'], KEYS_FILE), 'a', encoding='utf-8') as f:
+                    f.write(''.join(f"{key}\n" for key, _ in new_rows))
+
+                for key, _ in new_rows:
+                    store['index'][key] = store['rows']
+                    store['rows'] += 1
+                self._map_vectors(store, store['rows'])
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and tier sizes"""
+        with self._lock:
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_items': len(self._memory),
+                'memory_bytes': sum(vector.nbytes for vector in self._memory.values()),
+                'disk_items': sum(store['rows'] for store in self._disk.values())
+            }
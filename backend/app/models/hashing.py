@@ -0,0 +1,82 @@
+"""
+Stateless hashing vectorizer.
+
+Tokens are hashed straight into a fixed number of feature columns, so there
+is no vocabulary to fit or keep in memory: the vectorizer's size does not
+grow with the corpus, words first seen after training still count, and
+texts can be transformed in any number of processes at once. Inverse
+document frequency weighting is optional; its statistics are one document
+count per column, accumulated chunk by chunk in a single streaming pass.
+"""
+
+from typing import List
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+def _document_counts(hasher: HashingVectorizer, texts: List[str]):
+    """Number of texts each column occurs in, and the number of texts"""
+    X = hasher.transform(texts)
+    # Duplicate tokens are summed, so a row's column indices are unique
+    return np.bincount(X.indices, minlength=hasher.n_features), X.shape[0]
+
+
+class StreamingHashingVectorizer:
+    def __init__(self, n_features: int = 2 ** 18, idf: bool = False, chunk_size: int = 1000):
+        if n_features < 1:
+            raise ValueError(f"Hashing vectorizer needs at least one feature, got {n_features}")
+        self.n_features = n_features
+        self.idf = idf
+        self.chunk_size = max(1, chunk_size)
+        # Raw non-negative counts, so MultinomialNB can use them; rows are
+        # weighted and L2-normalized after hashing
+        self.hasher = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None, dtype=np.float32)
+        self.n_documents = 0
+        self.document_frequency = np.zeros(n_features, dtype=np.int64) if idf else None
+        self.idf_ = None
+
+    def _chunks(self, texts: List[str]) -> List[List[str]]:
+        return [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+
+    def _map_chunks(self, fn, texts: List[str], n_jobs: int) -> List:
+        chunks = self._chunks(texts)
+        if n_jobs == 1 or len(chunks) < 2:
+            return [fn(self.hasher, chunk) for chunk in chunks]
+        # The hasher holds no fitted state, so every worker transforms its chunk independently
+        return Parallel(n_jobs=n_jobs)(delayed(fn)(self.hasher, chunk) for chunk in chunks)
+
+    def partial_fit(self, texts: List[str], n_jobs: int = 1) -> 'StreamingHashingVectorizer':
+        """Add the texts' document frequencies to the IDF statistics"""
+        if not self.idf:
+            return self
+        for counts, n_documents in self._map_chunks(_document_counts, texts, n_jobs):
+            self.document_frequency += counts
+            self.n_documents += n_documents
+        # Smoothed like TfidfVectorizer's: as if one extra text held every term
+        self.idf_ = (np.log((1 + self.n_documents) / (1 + self.document_frequency)) + 1).astype(np.float32)
+        return self
+
+    def fit(self, texts: List[str], n_jobs: int = 1) -> 'StreamingHashingVectorizer':
+        """Collect the IDF statistics from scratch; a no-op without IDF"""
+        if self.idf:
+            self.n_documents = 0
+            self.document_frequency = np.zeros(self.n_features, dtype=np.int64)
+        return self.partial_fit(texts, n_jobs)
+
+    def transform(self, texts: List[str], n_jobs: int = 1) -> sparse.csr_matrix:
+        """L2-normalized (idf-weighted) term counts as a float32 CSR matrix"""
+        if self.idf and self.idf_ is None:
+            raise ValueError("Hashing vectorizer IDF statistics are not fitted")
+        if not texts:
+            return sparse.csr_matrix((0, self.n_features), dtype=np.float32)
+        if n_jobs == 1:
+            X = self.hasher.transform(texts)
+        else:
+            X = sparse.vstack(self._map_chunks(HashingVectorizer.transform, texts, n_jobs), format='csr')
+        if self.idf:
+            X.data *= self.idf_[X.indices]
+        return normalize(X, copy=False)
@@ -0,0 +1,83 @@
+import numpy as np
+from scipy import sparse
+
+
+def _stack(blocks):
+    if any(sparse.issparse(block) for block in blocks):
+        return sparse.vstack([sparse.csr_matrix(block) for block in blocks], format='csr')
+    return np.vstack(blocks)
+
+
+class BufferedKNeighborsClassifier:
+    """
+    Exact k-nearest-neighbours classifier whose reference set grows in O(batch).
+
+    Wraps a fitted KNeighborsClassifier, which is never refitted. Samples
+    added with partial_fit go into appended chunks that are searched by
+    brute force next to it, and the k nearest over all of them vote. A new
+    chunk is merged with the previous one while that one is no larger, so
+    each sample is copied O(log n) times and there are O(log n) chunks to
+    search. The next full retrain folds everything back into one model.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.n_neighbors = base.n_neighbors
+        self.classes_ = base.classes_
+        self.chunks_ = []  # (vectors, encoded labels), oldest and largest first
+
+    def partial_fit(self, X, y):
+        """
+        Append labeled samples. Attributes are replaced rather than modified,
+        so a shallow copy can be updated while the original keeps serving.
+        """
+        y = np.asarray(y)
+        # New classes go at the end, so existing encoded labels stay valid
+        new_classes = np.setdiff1d(np.unique(y), self.classes_)
+        classes = np.concatenate([self.classes_, new_classes]) if len(new_classes) else self.classes_
+        index = {label: i for i, label in enumerate(classes.tolist())}
+        labels = np.array([index[label] for label in y.tolist()], dtype=np.int32)
+
+        chunks = list(self.chunks_)
+        vectors = X
+        while chunks and chunks[-1][1].shape[0] <= labels.shape[0]:
+            previous_vectors, previous_labels = chunks.pop()
+            vectors = _stack([previous_vectors, vectors])
+            labels = np.concatenate([previous_labels, labels])
+        chunks.append((vectors, labels))
+
+        self.classes_ = classes
+        self.chunks_ = chunks
+        return self
+
+    def _neighbours(self, X):
+        """Distances and encoded labels of the k nearest samples over the model and its chunks"""
+        from sklearn.metrics import pairwise_distances
+
+        base = self.base
+        distances, indices = base.kneighbors(X, n_neighbors=min(self.n_neighbors, base.n_samples_fit_))
+        all_distances = [distances]
+        all_labels = [base._y[indices]]
+        for vectors, labels in self.chunks_:
+            chunk_distances = pairwise_distances(
+                X, vectors, metric=base.effective_metric_, **base.effective_metric_params_
+            )
+            k = min(self.n_neighbors, chunk_distances.shape[1])
+            nearest = np.argpartition(chunk_distances, k - 1, axis=1)[:, :k]
+            all_distances.append(np.take_along_axis(chunk_distances, nearest, axis=1))
+            all_labels.append(labels[nearest])
+
+        distances = np.hstack(all_distances)
+        labels = np.hstack(all_labels)
+        k = min(self.n_neighbors, distances.shape[1])
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        return np.take_along_axis(labels, nearest, axis=1)
+
+    def predict_proba(self, X) -> np.ndarray:
+        labels = self._neighbours(X)
+        probas = np.zeros((labels.shape[0], len(self.classes_)))
+        np.add.at(probas, (np.arange(labels.shape[0])[:, None], labels), 1)
+        return probas / labels.shape[1]
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -1,16 +1,78 @@
-from typing import List, Literal
+import threading
+from typing import Dict, List, Literal, Optional
+
 import numpy as np
 from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
-from sentence_transformers import SentenceTransformer
+
+from app.config import settings
+from app.utils.memory import deep_nbytes
+from app.utils.metrics import STAGE_DURATION, EMBEDDING_TOKENS
+from .embedding_cache import EmbeddingCache
+from .embedding_backends import EMBEDDING_BACKENDS, load_encoder
+from .embedding_batching import plan_batches, padded_tokens, token_windows, pool_chunks
+from .hashing import StreamingHashingVectorizer
+
+VECTORIZATION_METHODS = ['bow', 'tfidf', 'hashing', 'embeddings']
+# Methods whose components are slow to load (model download, torch import)
+HEAVY_METHODS = ('embeddings',)
+# What to do with texts longer than the encoder's max sequence length
+LONG_TEXT_MODES = ['truncate', 'chunk']
 
 class EmbeddingVectorizer:
     def __init__(
         self,
         model_name: str = 'intfloat/multilingual-e5-base',
-        normalize: bool = True
+        normalize: bool = True,
+        cache: Optional[EmbeddingCache] = None,
+        backend: str = 'torch',
+        batch_size: int = 32,
+        max_batch_tokens: int = 0,
+        long_text: str = 'truncate',
+        chunk_overlap: int = 64
     ):
-        self.model = SentenceTransformer(model_name)
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend}. Must be one of: {EMBEDDING_BACKENDS}")
+        if long_text not in LONG_TEXT_MODES:
+            raise ValueError(f"Unknown long text mode: {long_text}. Must be one of: {LONG_TEXT_MODES}")
+        if chunk_overlap < 0:
+            raise ValueError(f"Chunk overlap must not be negative, got {chunk_overlap}")
+        self.model_name = model_name
         self.normalize = normalize
+        self.cache = cache
+        self.backend = backend
+        # Inputs are encoded in length-sorted batches of at most batch_size texts
+        # and, if max_batch_tokens is set, that many tokens including padding
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.long_text = long_text
+        self.chunk_overlap = chunk_overlap
+        # Each backend produces slightly different vectors, so cache them separately
+        self.cache_name = model_name if backend == 'torch' else f"{model_name}@{backend}"
+        # The encoder (and torch) are only loaded on first use or warm-up
+        self._model = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    model = load_encoder(self.model_name, self.backend)
+                    if self.long_text == 'chunk':
+                        # Fail at load time rather than split texts into one window per token
+                        for mode in ['query', 'passage']:
+                            window = self._window_size(model, f"{mode}: ")
+                            if self.chunk_overlap >= window:
+                                raise ValueError(
+                                    f"Chunk overlap {self.chunk_overlap} must be below the encoder's "
+                                    f"{window}-token window"
+                                )
+                    self._model = model
+        return self._model
 
     def _format_inputs(
         self,
@@ -21,18 +83,114 @@ class EmbeddingVectorizer:
             raise ValueError("mode must be either 'query' or 'passage'")
         return [f"{mode}: {text.strip()}" for text in texts]
 
+    @staticmethod
+    def _window_size(model, prefix: str) -> int:
+        """Text tokens per window; every window also carries the special tokens and the mode prefix"""
+        tokenizer = model.tokenizer
+        overhead = tokenizer.num_special_tokens_to_add()
+        if prefix:
+            overhead += len(tokenizer(prefix, add_special_tokens=False)['input_ids'])
+        return model.max_seq_length - overhead
+
+    def _split_long_inputs(self, texts: List[str], prefix: str, lengths: List[int], max_length: int):
+        """Replace each overlong input by overlapping windows of its tokens; returns inputs, lengths and owners"""
+        tokenizer = self.model.tokenizer
+        window = self._window_size(self.model, prefix)
+        overhead = max_length - window
+
+        inputs, input_lengths, owners = [], [], []
+        for i, (text, length) in enumerate(zip(texts, lengths)):
+            if length <= max_length:
+                inputs.append(prefix + text.strip())
+                input_lengths.append(length)
+                owners.append(i)
+                continue
+            ids = tokenizer(text.strip(), add_special_tokens=False, verbose=False)['input_ids']
+            for start, end in token_windows(len(ids), window, self.chunk_overlap):
+                inputs.append(prefix + tokenizer.decode(ids[start:end]))
+                input_lengths.append(end - start + overhead)
+                owners.append(i)
+        return inputs, input_lengths, owners
+
+    def _encode(self, texts: List[str], mode: str, batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Encode texts in length-sorted, padding-bounded batches and return the
+        rows in input order. In chunk mode, texts over the encoder's limit are
+        embedded as the length-weighted mean of their windows.
+        """
+        model = self.model
+        inputs = texts if mode == 'raw' else self._format_inputs(texts, mode)
+        max_length = model.max_seq_length
+        lengths = [len(ids) for ids in model.tokenizer(inputs, verbose=False)['input_ids']]
+
+        owners = None
+        if self.long_text == 'chunk' and max(lengths) > max_length:
+            prefix = '' if mode == 'raw' else f"{mode}: "
+            inputs, lengths, owners = self._split_long_inputs(texts, prefix, lengths, max_length)
+
+        # The encoder truncates whatever is still too long
+        EMBEDDING_TOKENS.inc(sum(max(0, length - max_length) for length in lengths), kind='truncated')
+        lengths = [min(length, max_length) for length in lengths]
+
+        batches = plan_batches(lengths, batch_size or self.batch_size, self.max_batch_tokens)
+        EMBEDDING_TOKENS.inc(sum(lengths), kind='input')
+        EMBEDDING_TOKENS.inc(padded_tokens(lengths, batches) - sum(lengths), kind='padding')
+
+        encoded = np.concatenate([
+            np.asarray(model.encode(
+                [inputs[i] for i in batch], batch_size=len(batch), normalize_embeddings=self.normalize
+            ), dtype=np.float32)
+            for batch in batches
+        ])
+        vectors = np.empty_like(encoded)
+        vectors[np.concatenate(batches)] = encoded
+
+        if owners is not None:
+            return pool_chunks(vectors, owners, lengths, len(texts), self.normalize)
+        return vectors
+
     def fit_transform(
         self,
         texts: List[str],
-        mode: Literal['query', 'passage'] = 'query'
+        mode: Literal['query', 'passage'] = 'query',
+        remember: bool = True,
+        batch_size: Optional[int] = None
     ):
-        if mode == 'raw':
-            inputs = texts
-        else:
-            inputs = self._format_inputs(texts, mode)
+        """
+        Encode texts into a float32 matrix, reusing cached vectors. With
+        remember=False vectors skip the in-memory tier (new ones still go to disk).
+        """
+        if mode not in ['query', 'passage', 'raw']:
+            raise ValueError("mode must be either 'query' or 'passage'")
+
+        if self.cache is None:
+            return self._encode(texts, mode, batch_size)
+
+        # The cache key covers the prefix mode, normalization and long text handling
+        cache_mode = f"{mode}:{'norm' if self.normalize else 'raw'}"
+        if self.long_text == 'chunk':
+            cache_mode += ':chunk'
+        keys = [EmbeddingCache.make_key(self.cache_name, cache_mode, text) for text in texts]
+        vectors = self.cache.get_many(self.cache_name, keys, remember=remember)
 
-        embeddings = self.model.encode(inputs, normalize_embeddings=self.normalize)
-        return embeddings
+        # Encode each distinct missing input once
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], i)
+
+        if missing:
+            missing_keys = list(missing.keys())
+            encoded = self._encode([texts[missing[key]] for key in missing_keys], mode, batch_size)
+            self.cache.put_many(self.cache_name, missing_keys, encoded, remember=remember)
+
+            encoded_by_key = dict(zip(missing_keys, encoded))
+            vectors = [
+                encoded_by_key[key] if vector is None else vector
+                for key, vector in zip(keys, vectors)
+            ]
+
+        return np.stack(vectors).astype(np.float32, copy=False)
 
     def transform_numpy(
         self,
@@ -42,40 +200,146 @@ class EmbeddingVectorizer:
         return np.array(self.fit_transform(texts, mode=mode))
 
 class VectorizerManager:
-    def __init__(self):
-        self.bow_vectorizer = CountVectorizer()
-        self.tfidf_vectorizer = TfidfVectorizer()
-        self.embedding_vectorizer = EmbeddingVectorizer()
+    def __init__(self, methods: Optional[List[str]] = None, embedding_vectorizer: Optional[EmbeddingVectorizer] = None):
+        self.methods = list(methods or settings.enabled_methods)
+        for method in self.methods:
+            if method not in VECTORIZATION_METHODS:
+                raise ValueError(f"Unknown vectorization method: {method}")
+
+        # Disabled methods are never constructed, fitted or loaded. float32
+        # features halve the training matrices KNN keeps and the KMeans centroids
+        self.bow_vectorizer = CountVectorizer(dtype=np.float32) if 'bow' in self.methods else None
+        self.tfidf_vectorizer = TfidfVectorizer(dtype=np.float32) if 'tfidf' in self.methods else None
+        self.hashing_vectorizer = StreamingHashingVectorizer(
+            n_features=settings.hashing_features,
+            idf=settings.hashing_idf,
+            chunk_size=settings.ingest_chunk_size
+        ) if 'hashing' in self.methods else None
+        if embedding_vectorizer is not None:
+            # The encoder needs no fitting, so new generations share the loaded one and its cache
+            self.embedding_vectorizer = embedding_vectorizer
+            self.embedding_cache = embedding_vectorizer.cache
+        else:
+            self.embedding_cache = EmbeddingCache(
+                max_items=settings.embedding_cache_size,
+                cache_dir=settings.embedding_cache_dir if settings.embedding_cache_disk else None
+            )
+            self.embedding_vectorizer = EmbeddingVectorizer(
+                cache=self.embedding_cache,
+                backend=settings.embedding_backend,
+                batch_size=settings.embedding_batch_size,
+                max_batch_tokens=settings.embedding_max_batch_tokens,
+                long_text=settings.embedding_long_text,
+                chunk_overlap=settings.embedding_chunk_overlap
+            )
         self.is_fitted = {
             'bow': False,
             'tfidf': False,
+            'hashing': False,
             'embeddings': False
         }
 
     def fit_vectorizers(self, texts: List[str]):
-        """Fit all vectorizers on training data"""
-        self.bow_vectorizer.fit(texts)
-        self.tfidf_vectorizer.fit(texts)
+        """Fit the enabled vectorizers on training data"""
+        if 'bow' in self.methods:
+            self.bow_vectorizer.fit(texts)
+        if 'tfidf' in self.methods:
+            self.tfidf_vectorizer.fit(texts)
+        if 'hashing' in self.methods:
+            # Only the optional idf statistics; hashing itself has nothing to fit
+            self.hashing_vectorizer.fit(texts, n_jobs=settings.training_jobs)
         # Embedding vectorizer doesn't need fitting
-        self.is_fitted = {
-            'bow': True,
-            'tfidf': True,
-            'embeddings': True
+        self.is_fitted = {method: method in self.methods for method in VECTORIZATION_METHODS}
+
+    def warm_up(self, method: str):
+        """Load a method's heavy components now rather than on its first request"""
+        if method == 'embeddings' and 'embeddings' in self.methods:
+            self.embedding_vectorizer.model
+
+    def is_loaded(self, method: str) -> bool:
+        """Whether a method can transform text without loading anything first"""
+        if not self.is_fitted.get(method, False):
+            return False
+        if method == 'embeddings':
+            return self.embedding_vectorizer.is_loaded
+        return True
+
+    def get_state(self) -> Dict:
+        """Get the fitted state of the vectorizers for persistence"""
+        return {
+            'bow_vectorizer': self.bow_vectorizer,
+            'tfidf_vectorizer': self.tfidf_vectorizer,
+            'hashing_vectorizer': self.hashing_vectorizer,
+            'embedding_model_name': self.embedding_vectorizer.model_name,
+            'is_fitted': self.is_fitted.copy()
         }
 
+    def load_state(self, state: Dict):
+        """Restore vectorizers from a state produced by get_state()"""
+        if state['embedding_model_name'] != self.embedding_vectorizer.model_name:
+            raise ValueError(
+                f"Saved vectorizers use embedding model {state['embedding_model_name']}, "
+                f"expected {self.embedding_vectorizer.model_name}"
+            )
+
+        missing = [method for method in self.methods if not state['is_fitted'].get(method, False)]
+        if missing:
+            raise ValueError(f"Saved vectorizers do not include {', '.join(missing)}")
+
+        if 'bow' in self.methods:
+            self.bow_vectorizer = state['bow_vectorizer']
+        if 'tfidf' in self.methods:
+            self.tfidf_vectorizer = state['tfidf_vectorizer']
+        if 'hashing' in self.methods:
+            self.hashing_vectorizer = state['hashing_vectorizer']
+        self.is_fitted = {method: method in self.methods for method in VECTORIZATION_METHODS}
+
     def transform_text(self, text: str, method: str = 'embeddings'):
         """Transform single text using specified method"""
+        return self.transform_texts([text], method)
+
+    def transform_texts(self, texts: List[str], method: str = 'embeddings', stage: str = 'vectorize'):
+        """
+        Transform a batch of texts into one feature matrix using specified method.
+        bow, tfidf and hashing return sparse CSR matrices, embeddings a dense array.
+        """
+        if method in VECTORIZATION_METHODS and method not in self.methods:
+            raise ValueError(f"Vectorization method {method} is disabled")
         if not self.is_fitted.get(method, False):
             raise ValueError(f"Vectorizer {method} is not fitted")
         
-        if method == 'bow':
-            return self.bow_vectorizer.transform([text]).toarray()
-        elif method == 'tfidf':
-            return self.tfidf_vectorizer.transform([text]).toarray()
-        elif method == 'embeddings':
-            return self.embedding_vectorizer.fit_transform([text])
-        else:
-            raise ValueError(f"Unknown vectorization method: {method}")
+        with STAGE_DURATION.time(stage=stage, method=method):
+            if method == 'bow':
+                return self.bow_vectorizer.transform(texts)
+            elif method == 'tfidf':
+                return self.tfidf_vectorizer.transform(texts)
+            elif method == 'hashing':
+                # Stateless, so a large training set is hashed in parallel chunks
+                n_jobs = settings.training_jobs if stage == 'train_vectorize' else 1
+                return self.hashing_vectorizer.transform(texts, n_jobs=n_jobs)
+            elif method == 'embeddings':
+                # Training vectors end up in the KNN models; keeping them in the
+                # in-memory cache too would hold a second copy and evict query vectors
+                training = stage == 'train_vectorize'
+                return self.embedding_vectorizer.fit_transform(
+                    texts,
+                    remember=not training,
+                    batch_size=settings.embedding_train_batch_size if training else None
+                )
+            else:
+                raise ValueError(f"Unknown vectorization method: {method}")
+
+    def get_memory_usage(self, seen: Optional[set] = None) -> Dict[str, int]:
+        """In-memory size in bytes of each fitted vectorizer; buffers already in `seen` are not counted again"""
+        seen = set() if seen is None else seen
+        usage = {}
+        if self.is_fitted.get('bow'):
+            usage['vectorizer_bow'] = deep_nbytes(self.bow_vectorizer, seen)
+        if self.is_fitted.get('tfidf'):
+            usage['vectorizer_tfidf'] = deep_nbytes(self.tfidf_vectorizer, seen)
+        if self.is_fitted.get('hashing'):
+            usage['vectorizer_hashing'] = deep_nbytes(self.hashing_vectorizer, seen)
+        return usage
 
     def get_feature_dimensions(self, method: str) -> int:
         """Get the number of features for a given method"""
@@ -83,6 +347,8 @@ class VectorizerManager:
             return len(self.bow_vectorizer.get_feature_names_out())
         elif method == 'tfidf':
             return len(self.tfidf_vectorizer.get_feature_names_out())
+        elif method == 'hashing':
+            return self.hashing_vectorizer.n_features
         elif method == 'embeddings':
             return 768  # Default dimension for multilingual-e5-base
         else:
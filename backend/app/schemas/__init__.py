@@ -1,6 +1,13 @@
 from .classification_schemas import (
     ClassificationRequest,
     ClassificationResponse,
+    BatchClassificationRequest,
+    BatchClassificationResult,
+    BatchTiming,
+    BatchClassificationResponse,
+    IncrementalTrainingRequest,
+    IncrementalTrainingResponse,
+    RetrainRequest,
     ModelPrediction,
     TrainingStatus,
     HealthResponse,
@@ -1,16 +1,22 @@
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 class ClassificationRequest(BaseModel):
     text: str = Field(..., description="Abstract text to classify")
     vectorization_method: str = Field(
         default="embeddings", 
-        description="Vectorization method: bow, tfidf, or embeddings"
+        description="Vectorization method: bow, tfidf, hashing, embeddings, or cascade"
     )
     model_name: Optional[str] = Field(
         default=None,
         description="Specific model to use: kmeans, knn, decision_tree, naive_bayes. If None, use all models"
     )
+    use_cache: bool = Field(default=True, description="Answer from the response cache if possible; false forces a fresh classification")
+    timeout_ms: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Give up with a 503 if classification hasn't started within this many milliseconds. If None, REQUEST_TIMEOUT_MS"
+    )
 
 class ModelPrediction(BaseModel):
     prediction: str
@@ -22,16 +28,90 @@ class ClassificationResponse(BaseModel):
     vectorization_method: str
     predictions: Dict[str, ModelPrediction]
     processing_time: float
+    cascade_stage: Optional[str] = Field(default=None, description="Method that answered in cascade mode")
+    cascade_confidence: Optional[float] = Field(default=None, description="Gate model confidence in cascade mode")
+    generation_id: Optional[str] = Field(default=None, description="Model generation that produced the predictions")
+    cached: bool = Field(default=False, description="Whether the response came from the response cache")
+
+class BatchClassificationRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, description="Abstract texts to classify")
+    vectorization_method: str = Field(
+        default="embeddings",
+        description="Vectorization method: bow, tfidf, hashing, embeddings, or cascade"
+    )
+    model_name: Optional[str] = Field(
+        default=None,
+        description="Specific model to use: kmeans, knn, decision_tree, naive_bayes. If None, use all models"
+    )
+    timeout_ms: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Give up with a 503 if classification hasn't started within this many milliseconds. If None, REQUEST_TIMEOUT_MS"
+    )
+
+class BatchClassificationResult(BaseModel):
+    input_text: str
+    predictions: Dict[str, ModelPrediction]
+    cascade_stage: Optional[str] = None
+    cascade_confidence: Optional[float] = None
+
+class BatchTiming(BaseModel):
+    preprocessing: float
+    vectorization: float
+    prediction: float
+
+class BatchClassificationResponse(BaseModel):
+    vectorization_method: str
+    results: List[BatchClassificationResult]
+    timing: BatchTiming
+    processing_time: float
+    generation_id: Optional[str] = None
+
+class IncrementalTrainingRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, description="Abstract texts to learn from")
+    labels: List[str] = Field(..., min_length=1, description="Category of each text")
+    methods: Optional[List[str]] = Field(
+        default=None,
+        description="Vectorization methods whose models to update. If None, every ready method"
+    )
+    persist: bool = Field(default=False, description="Also rewrite the artifact bundle")
+
+class IncrementalTrainingResponse(BaseModel):
+    samples: int
+    total_incremental_samples: int
+    models: Dict[str, str]
+    artifact_id: Optional[str] = None
+    generation_id: Optional[str] = None
+    processing_time: float
+
+class RetrainRequest(BaseModel):
+    sample_size: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Number of samples to train on. If None, SAMPLE_SIZE"
+    )
 
 class TrainingStatus(BaseModel):
     models_trained: Dict[str, bool]
     vectorizers_fitted: Dict[str, bool]
     available_categories: List[str]
+    artifact_id: Optional[str] = None
+    generation: Optional[Dict[str, Any]] = None
+    memory: Optional[Dict[str, int]] = None
+    method_status: Optional[Dict[str, str]] = None
+    model_fit_times: Optional[Dict[str, float]] = None
+    cascade: Optional[Dict[str, Any]] = None
+    embedding_cache: Optional[Dict[str, int]] = None
+    response_cache: Optional[Dict[str, Any]] = None
+    admission: Optional[Dict[str, Any]] = None
+    embedding_batcher: Optional[Dict[str, Any]] = None
 
 class HealthResponse(BaseModel):
     status: str
     message: str
     timestamp: str
+    methods: Optional[Dict[str, str]] = None
+    pool: Optional[Dict[str, Any]] = None
 
 class ErrorResponse(BaseModel):
     error: str
@@ -0,0 +1,175 @@
+"""
+Admission control for classification requests.
+
+Each vectorization method has a bounded number of requests in flight and a
+bounded queue of requests waiting for a slot. Requests arrive in one of two
+lanes: 'interactive' (/classify) is always served first, while 'bulk'
+(/classify/batch, /classify/bulk) may only hold a share of the slots, so
+bulk traffic can't starve single classifications. Requests that would
+overflow the queue, or whose deadline passes while they wait, are rejected
+at once with a suggested retry delay instead of piling up.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from app.utils.metrics import registry
+
+LANES = ['interactive', 'bulk']
+
+ADMISSION_REJECTIONS = registry.counter(
+    'classifier_admission_rejections_total',
+    'Requests rejected by admission control',
+    ['method', 'lane', 'reason']
+)
+
+
+class OverloadedError(Exception):
+    """Raised when a method's admission queue is full"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a request's deadline passes before its work starts"""
+
+
+def check_deadline(deadline: Optional[float], stage: str):
+    """Drop work whose deadline (a time.time() timestamp) has already passed"""
+    if deadline is not None and time.time() > deadline:
+        raise DeadlineExceededError(f"Request deadline passed before {stage}")
+
+
+class _MethodState:
+    def __init__(self, limit: int, bulk_limit: int):
+        self.limit = limit
+        self.bulk_limit = bulk_limit
+        self.in_flight = {lane: 0 for lane in LANES}
+        self.waiting = {lane: deque() for lane in LANES}
+        self.admitted = {lane: 0 for lane in LANES}
+        self.mean_duration = None  # Exponentially weighted, in seconds
+
+    def can_start(self, lane: str) -> bool:
+        if sum(self.in_flight.values()) >= self.limit:
+            return False
+        return lane == 'interactive' or self.in_flight['bulk'] < self.bulk_limit
+
+    def queued(self) -> int:
+        return sum(len(waiting) for waiting in self.waiting.values())
+
+
+class AdmissionController:
+    """
+    Per-method concurrency limits with priority lanes and deadlines.
+    Must be used from a single event loop.
+    """
+
+    def __init__(self, limits: Dict[str, int], default_limit: int = 32, max_queue: int = 128, bulk_share: float = 0.5):
+        self.limits = limits
+        self.default_limit = default_limit
+        self.max_queue = max_queue
+        self.bulk_share = bulk_share
+        self._methods: Dict[str, _MethodState] = {}
+
+    def _state(self, method: str) -> _MethodState:
+        if method not in self._methods:
+            limit = max(1, self.limits.get(method, self.default_limit))
+            self._methods[method] = _MethodState(limit, max(1, int(limit * self.bulk_share)))
+        return self._methods[method]
+
+    def retry_after(self, method: str) -> int:
+        """Seconds until the method's current backlog should have drained"""
+        state = self._state(method)
+        if not state.mean_duration:
+            return 1
+        backlog = sum(state.in_flight.values()) + state.queued()
+        return max(1, math.ceil(state.mean_duration * backlog / state.limit))
+
+    @asynccontextmanager
+    async def admit(self, method: str, lane: str = 'interactive', deadline: Optional[float] = None, bounded: bool = True):
+        """
+        Hold one of the method's slots for the duration of the block.
+        Unbounded requests (chunks of a response that is already streaming)
+        wait for a slot however long the queue is.
+        """
+        state = self._state(method)
+        await self._acquire(state, method, lane, deadline, bounded)
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            duration = time.time() - start_time
+            if state.mean_duration is None:
+                state.mean_duration = duration
+            else:
+                state.mean_duration = 0.8 * state.mean_duration + 0.2 * duration
+            self._release(state, lane)
+
+    async def _acquire(self, state: _MethodState, method: str, lane: str, deadline: Optional[float], bounded: bool):
+        if not state.waiting[lane] and state.can_start(lane):
+            state.in_flight[lane] += 1
+            state.admitted[lane] += 1
+            return
+
+        if bounded and state.queued() >= self.max_queue:
+            ADMISSION_REJECTIONS.inc(method=method, lane=lane, reason='queue_full')
+            raise OverloadedError(
+                f"Too many {method} requests in flight ({state.limit} running, {state.queued()} queued)",
+                retry_after=self.retry_after(method)
+            )
+
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                ADMISSION_REJECTIONS.inc(method=method, lane=lane, reason='deadline')
+                raise DeadlineExceededError("Request deadline passed before it was admitted")
+
+        future = asyncio.get_running_loop().create_future()
+        state.waiting[lane].append(future)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the wait ended; pass it on
+                self._release(state, lane)
+            else:
+                future.cancel()
+                state.waiting[lane].remove(future)
+            if isinstance(e, asyncio.TimeoutError):
+                ADMISSION_REJECTIONS.inc(method=method, lane=lane, reason='deadline')
+                raise DeadlineExceededError("Request deadline passed while waiting to be admitted")
+            raise
+        state.admitted[lane] += 1
+
+    def _release(self, state: _MethodState, lane: str):
+        state.in_flight[lane] -= 1
+        # Hand freed slots to waiting interactive requests first
+        for next_lane in LANES:
+            waiting = state.waiting[next_lane]
+            while waiting and state.can_start(next_lane):
+                future = waiting.popleft()
+                if future.done():
+                    continue
+                state.in_flight[next_lane] += 1
+                future.set_result(None)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Limits, in-flight and queued requests and admissions per method and lane"""
+        return {
+            method: {
+                'limit': state.limit,
+                'bulk_limit': state.bulk_limit,
+                'in_flight': dict(state.in_flight),
+                'queued': {lane: len(waiting) for lane, waiting in state.waiting.items()},
+                'admitted': dict(state.admitted),
+                'mean_duration': state.mean_duration
+            }
+            for method, state in sorted(self._methods.items())
+        }
@@ -0,0 +1,124 @@
+"""
+Bulk classification of JSONL/CSV corpora with NDJSON output.
+
+Records are read lazily from a text stream, grouped into chunks and each
+chunk goes through the batch pipeline, so memory stays bounded by the chunk
+size no matter how large the input is. Each input record produces exactly
+one output line, in input order.
+"""
+
+import csv
+import json
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+# Input fields holding the abstract and an optional caller-provided id
+TEXT_FIELDS = ('text', 'abstract')
+ID_FIELDS = ('id',)
+INPUT_FORMATS = ['jsonl', 'csv']
+
+
+def detect_format(filename: Optional[str]) -> str:
+    """Infer the input format from a file name; defaults to JSONL"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    return 'csv' if extension in ('.csv', '.tsv') else 'jsonl'
+
+
+def _make_record(index: int, fields) -> Dict:
+    if not isinstance(fields, dict):
+        return {'index': index, 'id': None, 'text': None, 'error': "Record is not an object"}
+
+    record_id = next((fields[name] for name in ID_FIELDS if fields.get(name) not in (None, '')), None)
+    text = next((fields[name] for name in TEXT_FIELDS if fields.get(name) not in (None, '')), None)
+    if not isinstance(text, str) or not text.strip():
+        return {'index': index, 'id': record_id, 'text': None, 'error': f"No text in any of {list(TEXT_FIELDS)}"}
+    return {'index': index, 'id': record_id, 'text': text, 'error': None}
+
+
+def iter_records(stream: TextIO, input_format: str = 'jsonl') -> Iterator[Dict]:
+    """
+    Yield {index, id, text, error} for each record of a JSONL or CSV stream.
+    Malformed records carry an error instead of stopping the whole file.
+    """
+    if input_format not in INPUT_FORMATS:
+        raise ValueError(f"Unknown input format: {input_format}. Must be one of: {INPUT_FORMATS}")
+
+    if input_format == 'csv':
+        # Abstracts can exceed the csv module's default field limit
+        csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+        for index, row in enumerate(csv.DictReader(stream)):
+            yield _make_record(index, row)
+        return
+
+    index = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {'index': index, 'id': None, 'text': None, 'error': f"Invalid JSON: {str(e)}"}
+        else:
+            yield _make_record(index, fields)
+        index += 1
+
+
+def iter_chunks(records: Iterable[Dict], chunk_size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def texts_to_classify(chunk: List[Dict]) -> List[str]:
+    return [record['text'] for record in chunk if record['error'] is None]
+
+
+def format_chunk(chunk: List[Dict], response, include_text: bool = False) -> str:
+    """
+    Render one NDJSON line per record of a chunk, given the
+    BatchClassificationResponse for its valid records (or None if there were none)
+    """
+    results = iter(response.results if response is not None else [])
+    lines = []
+    for record in chunk:
+        line = {'index': record['index']}
+        if record['id'] is not None:
+            line['id'] = record['id']
+        if include_text:
+            line['input_text'] = record['text']
+
+        if record['error'] is not None:
+            line['error'] = record['error']
+        else:
+            result = next(results)
+            line['predictions'] = {
+                model_name: prediction.model_dump(exclude_none=True)
+                for model_name, prediction in result.predictions.items()
+            }
+            if result.cascade_stage is not None:
+                line['cascade_stage'] = result.cascade_stage
+            line['generation_id'] = response.generation_id
+        lines.append(json.dumps(line, ensure_ascii=False))
+    return '\n'.join(lines) + '\n'
+
+
+def classify_stream(
+    service,
+    stream: TextIO,
+    input_format: str = 'jsonl',
+    vectorization_method: str = 'embeddings',
+    model_name: str = None,
+    chunk_size: int = 512,
+    include_text: bool = False
+) -> Iterator[str]:
+    """Classify a JSONL/CSV stream chunk by chunk, yielding NDJSON text"""
+    for chunk in iter_chunks(iter_records(stream, input_format), chunk_size):
+        texts = texts_to_classify(chunk)
+        response = service.classify_batch(texts, vectorization_method, model_name) if texts else None
+        yield format_chunk(chunk, response, include_text)
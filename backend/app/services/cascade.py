@@ -0,0 +1,84 @@
+"""
+Confidence-gated cascade: a cheap sparse model answers first and only
+uncertain texts are escalated to the embedding models.
+
+The gate threshold comes from CASCADE_THRESHOLD, or else from the file
+written by the offline calibration (python -m app.calibrate_cascade),
+or else DEFAULT_CASCADE_THRESHOLD.
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+CASCADE_METHOD = 'cascade'
+DEFAULT_CASCADE_THRESHOLD = 0.9
+
+
+def calibrate_threshold(
+    confidences: np.ndarray,
+    gate_correct: np.ndarray,
+    escalated_correct: np.ndarray,
+    target_accuracy: float
+) -> Dict:
+    """
+    Pick the gate threshold that escalates the fewest texts while the
+    cascade still reaches target_accuracy on a held-out set.
+
+    A text is answered by the gate when its confidence >= threshold and by
+    the escalation stage otherwise. If no threshold reaches the target, the
+    most accurate one is returned with target_met False.
+    """
+    confidences = np.asarray(confidences, dtype=np.float64)
+    gate_correct = np.asarray(gate_correct, dtype=bool)
+    escalated_correct = np.asarray(escalated_correct, dtype=bool)
+    n = len(confidences)
+    if n == 0:
+        raise ValueError("Calibration needs at least one held-out sample")
+
+    # Candidate thresholds: every distinct confidence, plus "escalate everything"
+    thresholds = np.append(np.unique(confidences), np.inf)
+
+    # For each threshold, count gate-answered texts and correct answers per stage
+    order = np.argsort(confidences)
+    sorted_confidences = confidences[order]
+    # Texts below the threshold are escalated: the first `escalated` in sorted order
+    escalated = np.searchsorted(sorted_confidences, thresholds, side='left')
+    gate_correct_suffix = np.concatenate([np.cumsum(gate_correct[order][::-1])[::-1], [0]])
+    escalated_correct_prefix = np.concatenate([[0], np.cumsum(escalated_correct[order])])
+    accuracy = (gate_correct_suffix[escalated] + escalated_correct_prefix[escalated]) / n
+    escalation_rate = escalated / n
+
+    reaching = np.flatnonzero(accuracy >= target_accuracy)
+    if len(reaching):
+        # Among thresholds that reach the target, escalate as little as possible
+        best = reaching[np.argmin(escalation_rate[reaching])]
+    else:
+        best = int(np.argmax(accuracy))
+
+    return {
+        'threshold': float(thresholds[best]) if np.isfinite(thresholds[best]) else 1.01,
+        'target_accuracy': target_accuracy,
+        'target_met': bool(len(reaching)),
+        'accuracy': float(accuracy[best]),
+        'escalation_rate': float(escalation_rate[best]),
+        'gate_only_accuracy': float(gate_correct.mean()),
+        'escalated_only_accuracy': float(escalated_correct.mean()),
+        'samples': n
+    }
+
+
+def save_calibration(path: str, calibration: Dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(calibration, f, indent=2)
+
+
+def load_calibration(path: str) -> Optional[Dict]:
+    """Read a calibration file, or return None if there is none"""
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -1,11 +1,39 @@
+import asyncio
+import threading
 import time
-from datasets import load_dataset
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from sklearn.model_selection import train_test_split
 
 from app import VectorizerManager
 from app import ClassificationModelManager
-from app import preprocess_text
+from app import preprocess_text, preprocess_batch
 from app import ClassificationResponse, ModelPrediction, TrainingStatus
+from app import BatchClassificationResponse, BatchClassificationResult, BatchTiming
+from app import IncrementalTrainingResponse
+from app.config import settings
+from app.utils.metrics import (
+    registry, STAGE_DURATION, CLASSIFIED_TEXTS, INITIALIZATION_DURATION, MODEL_MEMORY
+)
+from app.models.artifacts import load_bundle, read_manifest, save_bundle
+from app.models.vectorizers import VECTORIZATION_METHODS, HEAVY_METHODS
+from .micro_batcher import MicroBatcher, QueueFullError
+from .inference_executor import InferenceExecutor
+from .data_ingestion import TrainingDataLoader
+from .training_scheduler import TrainingScheduler
+from .cascade import CASCADE_METHOD, DEFAULT_CASCADE_THRESHOLD, load_calibration
+from .generations import GenerationRegistry, ModelGeneration
+from .worker_pool import WorkerRegistry, artifact_lock
+from .response_cache import ResponseCache
+from .admission import AdmissionController, DeadlineExceededError, check_deadline
+
+CASCADE_STAGES = registry.counter(
+    'classifier_cascade_answers_total',
+    'Texts answered per cascade stage',
+    ['stage']
+)
 
 class ClassificationService:
     def __init__(self):
@@ -13,173 +41,967 @@ class ClassificationService:
         self.categories = ['astro-ph', 'cond-mat', 'cs', 'math', 'physics']
         self.label_to_id = {label: i for i, label in enumerate(self.categories)}
         self.id_to_label = {i: label for i, label in enumerate(self.categories)}
+        self.model_names = ['kmeans', 'knn', 'decision_tree', 'naive_bayes']
+        
+        # Initialize managers; nothing heavy is loaded until initialize()
+        self.methods = list(settings.enabled_methods)
+        # Requests are served by the current generation; retraining publishes a new one
+        self.generations = GenerationRegistry(ModelGeneration(
+            VectorizerManager(self.methods),
+            ClassificationModelManager(self.label_to_id, self.id_to_label)
+        ))
+        self._update_lock = threading.Lock()  # Serializes building generations from the current one
+        self.retrain_task: Optional[asyncio.Task] = None
+        self.last_retrain = None
+
+        # Several serving processes share the bundle and report readiness as a pool
+        self.worker_registry = None
+        if settings.serving_workers > 1:
+            self.worker_registry = WorkerRegistry(
+                settings.pool_state_dir,
+                settings.serving_workers,
+                stale_after=max(30.0, 3 * settings.pool_sync_interval)
+            )
+        self.pool_sync_task: Optional[asyncio.Task] = None
+
+        # Repeated /classify requests are answered from cached responses
+        self.response_cache = None
+        if settings.response_cache:
+            self.response_cache = ResponseCache(
+                max_items=settings.response_cache_size,
+                ttl_seconds=settings.response_cache_ttl,
+                backend=settings.response_cache_backend,
+                path=settings.response_cache_path
+            )
+        
+        # CPU-bound inference runs on a worker pool, off the event loop
+        self.inference_executor = InferenceExecutor(
+            kind=settings.inference_executor,
+            max_workers=settings.inference_workers,
+            threads_per_worker=settings.inference_threads_per_worker
+        )
         
-        # Initialize managers
-        self.vectorizer_manager = VectorizerManager()
-        self.model_manager = ClassificationModelManager(self.label_to_id, self.id_to_label)
+        # Bounded concurrency per method, with interactive requests ahead of bulk ones
+        self.admission = None
+        if settings.admission_control:
+            self.admission = AdmissionController(
+                settings.admission_max_in_flight,
+                max_queue=settings.admission_max_queue,
+                bulk_share=settings.admission_bulk_share
+            )
         
+        # Concurrent embedding requests are encoded together
+        self.embedding_batcher = None
+        if settings.micro_batching and 'embeddings' in self.methods:
+            self.embedding_batcher = MicroBatcher(
+                encode_fn=lambda texts: self.vectorizer_manager.transform_texts(texts, 'embeddings'),
+                window_ms=settings.micro_batch_window_ms,
+                max_batch_size=settings.micro_batch_max_size,
+                max_queue_size=settings.micro_batch_max_queue
+            )
+        
+        self._register_metrics()
+        
+        self.dataset_name = "UniverseTBD/arxiv-abstracts-large"
         self.is_initialized = False
+        self.training_config = None
+        self.incremental_samples = 0
+        
+        # Per-method readiness: disabled, pending, warming, ready or failed
+        self.method_status = {
+            method: 'pending' if method in self.methods else 'disabled'
+            for method in VECTORIZATION_METHODS
+        }
+        self.warmup_task: Optional[asyncio.Task] = None
+        
+        self.cascade_threshold, self.cascade_threshold_source = self._resolve_cascade_threshold()
+
+    @property
+    def generation(self) -> ModelGeneration:
+        return self.generations.current
+
+    @property
+    def vectorizer_manager(self) -> VectorizerManager:
+        return self.generations.current.vectorizer_manager
+
+    @property
+    def model_manager(self) -> ClassificationModelManager:
+        return self.generations.current.model_manager
+
+    @property
+    def artifact_id(self) -> Optional[str]:
+        return self.generations.current.artifact_id
+
+    def _register_metrics(self):
+        """Expose cache and queue state as metrics read at scrape time"""
+        def cache_events():
+            stats = self.vectorizer_manager.embedding_cache.get_stats()
+            return {
+                ('memory_hit',): stats['memory_hits'],
+                ('disk_hit',): stats['disk_hits'],
+                ('miss',): stats['misses']
+            }
+
+        def cache_items():
+            stats = self.vectorizer_manager.embedding_cache.get_stats()
+            return {('memory',): stats['memory_items'], ('disk',): stats['disk_items']}
+
+        def response_cache_events():
+            if self.response_cache is None:
+                return {}
+            stats = self.response_cache.get_stats()
+            return {
+                ('hit',): stats['hits'],
+                ('shared_hit',): stats['shared_hits'],
+                ('miss',): stats['misses']
+            }
+
+        def admission_requests():
+            if self.admission is None:
+                return {}
+            requests = {}
+            for method, stats in self.admission.get_stats().items():
+                for lane in stats['in_flight']:
+                    requests[(method, lane, 'in_flight')] = stats['in_flight'][lane]
+                    requests[(method, lane, 'queued')] = stats['queued'][lane]
+            return requests
+
+        def batcher_queue_depth():
+            if self.embedding_batcher is None:
+                return {}
+            return {(): self.embedding_batcher.get_stats()['queue_depth']}
+
+        registry.counter(
+            'classifier_embedding_cache_lookups_total',
+            'Embedding cache lookups by result',
+            ['result'],
+            callback=cache_events
+        )
+        registry.gauge(
+            'classifier_embedding_cache_items',
+            'Vectors held per embedding cache tier',
+            ['tier'],
+            callback=cache_items
+        )
+        registry.counter(
+            'classifier_response_cache_lookups_total',
+            'Response cache lookups by result',
+            ['result'],
+            callback=response_cache_events
+        )
+        registry.gauge(
+            'classifier_admission_requests',
+            'Requests in flight or waiting for admission per method and lane',
+            ['method', 'lane', 'state'],
+            callback=admission_requests
+        )
+        registry.gauge(
+            'classifier_embedding_queue_depth',
+            'Embedding requests waiting for a micro-batch',
+            callback=batcher_queue_depth
+        )
+
+    def get_memory_usage(self) -> Dict[str, int]:
+        """
+        Bytes held per component of the current generation, the in-memory
+        embedding cache and retired generations still draining. Buffers
+        shared between components are counted once, for the first one.
+        """
+        seen = set()
+        generation = self.generation
+        usage = {}
+        usage.update(generation.vectorizer_manager.get_memory_usage(seen))
+        usage.update(generation.model_manager.get_memory_usage(seen))
+        usage['embedding_cache'] = generation.vectorizer_manager.embedding_cache.get_stats()['memory_bytes']
+        # Only what retired generations don't share with the current one
+        usage['retired_generations'] = sum(
+            sum(retired.vectorizer_manager.get_memory_usage(seen).values())
+            + sum(retired.model_manager.get_memory_usage(seen).values())
+            for retired in self.generations.get_retired_generations()
+        )
+        usage['total'] = sum(usage.values())
+        return usage
+
+    def _record_memory_metrics(self):
+        for component, size in self.get_memory_usage().items():
+            MODEL_MEMORY.set(size, component=component)
+
+    def get_training_config(self, sample_size: int) -> dict:
+        """Settings that determine the trained models; a saved bundle is stale if they differ"""
+        return {
+            'dataset': settings.training_data or self.dataset_name,
+            'categories': self.categories,
+            'sample_size': sample_size,
+            'samples_per_category': settings.samples_per_category,
+            'knn_index': settings.knn_index,
+            'knn_ivf_lists': settings.knn_ivf_lists,
+            'test_size': 0.2,
+            'embedding_model': self.vectorizer_manager.embedding_vectorizer.model_name,
+            'embedding_backend': self.vectorizer_manager.embedding_vectorizer.backend,
+            'embedding_long_text': self.vectorizer_manager.embedding_vectorizer.long_text,
+            'hashing_features': settings.hashing_features,
+            'hashing_idf': settings.hashing_idf
+        }
+
+    def _resolve_cascade_threshold(self) -> Tuple[float, str]:
+        """Explicit CASCADE_THRESHOLD, else the value calibrated for the configured models, else the default"""
+        if settings.cascade_threshold is not None:
+            return settings.cascade_threshold, 'config'
+
+        calibration = load_calibration(settings.cascade_calibration_file)
+        gate = {
+            'first_method': settings.cascade_first_method,
+            'gate_model': settings.cascade_gate_model,
+            'escalation_method': settings.cascade_escalation_method,
+            'escalation_model': settings.cascade_escalation_model
+        }
+        if calibration is not None and all(calibration.get(key) == value for key, value in gate.items()):
+            return calibration['threshold'], 'calibration'
+        return DEFAULT_CASCADE_THRESHOLD, 'default'
+
+    def get_method_status(self, method: str) -> Optional[str]:
+        """Readiness of a vectorization method; cascade is ready once both of its stages are"""
+        if method != CASCADE_METHOD:
+            return self.method_status.get(method)
+
+        stages = [
+            self.method_status.get(settings.cascade_first_method),
+            self.method_status.get(settings.cascade_escalation_method)
+        ]
+        for status in ['disabled', 'failed', 'warming', 'pending']:
+            if status in stages:
+                return status
+        return 'ready' if stages == ['ready', 'ready'] else 'disabled'
 
-    async def initialize(self, sample_size: int = 2000):
-        """Initialize the service by loading data and training models"""
+    def _set_method_status(self, methods: List[str], status: str):
+        for method in methods:
+            self.method_status[method] = status
+
+    def _save_artifacts(self, training_config: dict, generation: Optional[ModelGeneration] = None):
+        generation = generation or self.generation
+        if settings.save_artifacts:
+            manifest = save_bundle(
+                settings.artifact_dir,
+                generation.vectorizer_manager,
+                generation.model_manager,
+                training_config,
+                generation_id=generation.generation_id
+            )
+            generation.artifact_id = manifest['bundle_id']
+            print(f"Saved artifact bundle {generation.artifact_id} to {settings.artifact_dir}")
+
+    def _artifact_lock(self):
+        """Cross-process lock on the bundle when several serving workers share it"""
+        return artifact_lock(settings.artifact_dir) if self.worker_registry is not None else nullcontext()
+
+    @property
+    def _mmap_mode(self) -> Optional[str]:
+        return 'r' if settings.artifact_mmap else None
+
+    async def initialize(self, sample_size: int = 2000, require_artifacts: bool = False):
+        """
+        Initialize the service from a saved artifact bundle, or by loading data and training models.
+        With background warm-up, this returns once the light methods are ready and
+        the heavy ones (embeddings) finish loading or training in a background task.
+        With require_artifacts, a missing or stale bundle raises instead of training.
+        """
         if self.is_initialized:
             return
 
-        print("Loading dataset...")
-        # Load dataset
-        ds = load_dataset("UniverseTBD/arxiv-abstracts-large")
-        
-        print("Preparing samples...")
-        # Prepare samples
-        samples = []
-        for s in ds['train']:
-            if len(s['categories'].split(' ')) != 1:
-                continue
-
-            cur_category = s['categories'].strip().split('.')[0]
-            if cur_category not in self.categories:
-                continue
-
-            samples.append(s)
-
-            if len(samples) >= sample_size:
-                break
-
-        print(f"Preprocessing {len(samples)} samples...")
-        # Preprocess samples
-        preprocessed_samples = []
-        for s in samples:
-            abstract = preprocess_text(s['abstract'])
-            category = s['categories'].split(' ')[0].split('.')[0]
-            
-            preprocessed_samples.append({
-                "text": abstract,
-                "label": category
-            })
+        training_config = self.get_training_config(sample_size)
+        self.training_config = training_config
+        start_time = time.time()
+
+        light_methods = [method for method in self.methods if method not in HEAVY_METHODS]
+        heavy_methods = [method for method in self.methods if method in HEAVY_METHODS]
+        # Process workers load their own copy from the bundle, so the parent must finish first
+        background = (
+            settings.background_warmup
+            and self.inference_executor.kind == 'thread'
+            and bool(light_methods)
+            and bool(heavy_methods)
+        )
+
+        # With several serving workers, the first one trains and saves the bundle
+        # while the others wait here and then load it
+        self.publish_worker_state()
+        with self._artifact_lock():
+            loaded = settings.load_artifacts and self._load_artifacts(training_config)
+            if not loaded and require_artifacts:
+                raise ValueError(f"No up-to-date artifact bundle to load from {settings.artifact_dir}")
+            if not loaded:
+                X_train, _, y_train, _ = self.load_training_data(sample_size)
+                print("Fitting vectorizers...")
+                self.vectorizer_manager.fit_vectorizers(X_train)
+
+                if background and self.worker_registry is None:
+                    # Serve the light methods now; train the heavy ones in the background
+                    self.train_methods(X_train, y_train, light_methods)
+                    self._set_method_status(light_methods, 'ready')
+                    self.warmup_task = asyncio.create_task(
+                        self._warm_up_in_background(heavy_methods, X_train, y_train, training_config)
+                    )
+                else:
+                    self.train_methods(X_train, y_train, self.methods)
+                    self._set_method_status(self.methods, 'ready')
+                    self._save_artifacts(training_config)
+
+        if loaded:
+            self._set_method_status(light_methods, 'ready')
+            if self.inference_executor.kind == 'process':
+                # Only the workers encode text; they warm up in their initializer
+                self._set_method_status(heavy_methods, 'ready')
+            elif background:
+                self.warmup_task = asyncio.create_task(self._warm_up_in_background(heavy_methods))
+            else:
+                self.warm_up(heavy_methods)
+
+        INITIALIZATION_DURATION.set(time.time() - start_time, source='artifact' if loaded else 'train')
+        self._record_memory_metrics()
+        self.is_initialized = True
+        print("Classification service initialized successfully!")
+
+    def publish_worker_state(self):
+        """Heartbeat this worker's readiness for pool-wide health checks"""
+        if self.worker_registry is None:
+            return
+        self.worker_registry.publish({
+            'initialized': self.is_initialized,
+            'ready': self.is_initialized and all(self.method_status[method] == 'ready' for method in self.methods),
+            'generation_id': self.generation.generation_id,
+            'method_status': self.method_status
+        })
+
+    def get_pool_status(self) -> Optional[Dict]:
+        return self.worker_registry.get_pool_status() if self.worker_registry is not None else None
+
+    def start_pool_sync(self):
+        if self.worker_registry is not None and self.pool_sync_task is None:
+            self.pool_sync_task = asyncio.create_task(self._sync_with_pool())
+
+    async def stop_pool_sync(self):
+        if self.pool_sync_task is not None:
+            self.pool_sync_task.cancel()
+            self.pool_sync_task = None
+        if self.worker_registry is not None:
+            self.worker_registry.remove()
+
+    async def _sync_with_pool(self):
+        """Send heartbeats and pick up generations that another worker trained and saved"""
+        while True:
+            try:
+                await asyncio.to_thread(self._load_saved_generation)
+            except Exception as e:
+                print(f"Failed to load the saved generation: {str(e)}")
+            self.publish_worker_state()
+            await asyncio.sleep(settings.pool_sync_interval)
+
+    def _publish(self, generation: ModelGeneration) -> ModelGeneration:
+        """Serve a new generation and drop the responses cached for earlier ones"""
+        previous = self.generations.publish(generation)
+        if self.response_cache is not None:
+            self.response_cache.invalidate(generation.generation_id)
+        return previous
+
+    def _load_saved_generation(self):
+        """Publish the bundle's generation if it differs from the one being served"""
+        manifest = read_manifest(settings.artifact_dir)
+        if manifest is None or self.is_retraining or manifest.get('generation_id') == self.generation.generation_id:
+            return
+
+        training_config = self.get_training_config(manifest['training_config'].get('sample_size'))
+        generation = ModelGeneration(
+            VectorizerManager(self.methods, embedding_vectorizer=self.vectorizer_manager.embedding_vectorizer),
+            ClassificationModelManager(self.label_to_id, self.id_to_label)
+        )
+        with self._artifact_lock():
+            manifest = load_bundle(
+                settings.artifact_dir, generation.vectorizer_manager, generation.model_manager, training_config,
+                mmap_mode=self._mmap_mode
+            )
+        generation.generation_id = manifest.get('generation_id', manifest['bundle_id'])
+        generation.artifact_id = manifest['bundle_id']
+        generation.model_manager.set_knn_n_probe(settings.knn_ivf_probe)
+
+        with self._update_lock:
+            if generation.generation_id == self.generation.generation_id:
+                return
+            self._publish(generation)
+            self.training_config = training_config
+        print(f"Loaded generation {generation.generation_id} saved by another worker")
+
+    def _load_artifacts(self, training_config: dict) -> bool:
+        """Load the saved bundle into the current generation; False if it is missing or stale"""
+        try:
+            manifest = load_bundle(
+                settings.artifact_dir, self.vectorizer_manager, self.model_manager, training_config,
+                mmap_mode=self._mmap_mode
+            )
+        except ValueError as e:
+            print(f"Artifact bundle not loaded: {str(e)}")
+            return False
+
+        # Process workers and the parent report the same generation
+        self.generation.artifact_id = manifest['bundle_id']
+        self.generation.generation_id = manifest.get('generation_id', manifest['bundle_id'])
+        self.model_manager.set_knn_n_probe(settings.knn_ivf_probe)
+        print(f"Loaded artifact bundle {self.artifact_id} from {settings.artifact_dir}")
+        return True
+
+    def warm_up(self, methods: Optional[List[str]] = None):
+        """Load the heavy components of the given methods now rather than on first use"""
+        for method in methods or self.methods:
+            self.vectorizer_manager.warm_up(method)
+            self.method_status[method] = 'ready'
+
+    async def _warm_up_in_background(self, methods: List[str], X_train: List[str] = None, y_train: List[int] = None, training_config: dict = None):
+        """Load (and, given training data, train) heavy methods while the others serve requests"""
+        start_time = time.time()
+        for method in methods:
+            self.method_status[method] = 'warming'
+            print(f"Warming up {method} in the background...")
+            try:
+                await asyncio.to_thread(self.vectorizer_manager.warm_up, method)
+                if X_train is not None:
+                    await asyncio.to_thread(self.train_methods, X_train, y_train, [method])
+                self.method_status[method] = 'ready'
+                print(f"{method} is ready")
+            except Exception as e:
+                self.method_status[method] = 'failed'
+                print(f"Failed to warm up {method}: {str(e)}")
+
+        if training_config is not None and all(self.method_status[method] == 'ready' for method in methods):
+            await asyncio.to_thread(self._save_artifacts, training_config)
+        INITIALIZATION_DURATION.set(time.time() - start_time, source='warmup')
+        self._record_memory_metrics()
+
+    async def wait_until_ready(self):
+        """Wait for any background warm-up to finish"""
+        if self.warmup_task is not None:
+            await self.warmup_task
+
+    def load_training_data(self, sample_size: int):
+        """Stream and preprocess samples and return the stratified X_train, X_test, y_train, y_test split"""
+        print(f"Streaming samples from {settings.training_data or self.dataset_name}...")
+        # Stream, filter and preprocess samples in parallel chunks
+        loader = TrainingDataLoader(
+            categories=self.categories,
+            source=settings.training_data,
+            dataset_name=self.dataset_name,
+            chunk_size=settings.ingest_chunk_size,
+            workers=settings.ingest_workers,
+            per_category=settings.samples_per_category
+        )
+        X_full, labels = loader.load(sample_size)
+        print(f"Selected {len(X_full)} preprocessed samples")
 
         # Prepare training data
-        X_full = [sample['text'] for sample in preprocessed_samples]
-        y_full = [self.label_to_id[sample['label']] for sample in preprocessed_samples]
+        y_full = [self.label_to_id[label] for label in labels]
 
-        X_train, X_test, y_train, y_test = train_test_split(
+        return train_test_split(
             X_full, y_full, test_size=0.2, random_state=42, stratify=y_full
         )
 
+    def train_methods(self, X_train: List[str], y_train: List[int], methods: List[str], generation: Optional[ModelGeneration] = None):
+        """Train every model on each of the given (already fitted) vectorization methods"""
+        generation = generation or self.generation
+        # Compute each feature matrix once; bow/tfidf/hashing stay sparse
+        features = {}
+        for method in methods:
+            print(f"Vectorizing training data with {method}...")
+            features[method] = generation.vectorizer_manager.transform_texts(X_train, method, stage='train_vectorize')
+
+        print(f"Training models with {', '.join(methods)}...")
+        # Fit all model/vectorizer combinations concurrently
+        scheduler = TrainingScheduler(generation.model_manager, n_jobs=settings.training_jobs)
+        scheduler.train_all(features, y_train, self.model_names)
+
+    def train(self, sample_size: int):
+        """Load data, fit vectorizers and train every enabled model/vectorizer combination"""
+        X_train, _, y_train, _ = self.load_training_data(sample_size)
         print("Fitting vectorizers...")
-        # Fit vectorizers
         self.vectorizer_manager.fit_vectorizers(X_train)
+        self.train_methods(X_train, y_train, self.methods)
 
-        print("Training models...")
-        # Train models for each vectorization method
-        for method in ['bow', 'tfidf', 'embeddings']:
-            print(f"Training models with {method}...")
-            
-            # Transform training data
-            if method == 'bow':
-                X_train_vec = self.vectorizer_manager.bow_vectorizer.transform(X_train).toarray()
-            elif method == 'tfidf':
-                X_train_vec = self.vectorizer_manager.tfidf_vectorizer.transform(X_train).toarray()
-            else:  # embeddings
-                X_train_vec = self.vectorizer_manager.embedding_vectorizer.fit_transform(X_train)
-
-            # Train each model
-            for model_name in ['kmeans', 'knn', 'decision_tree', 'naive_bayes']:
-                model_key = f"{model_name}_{method}"
-                
-                # Create separate model instance for each combination
-                if model_name == 'kmeans':
-                    from sklearn.cluster import KMeans
-                    model = KMeans(n_clusters=len(self.categories), random_state=42)
-                elif model_name == 'knn':
-                    from sklearn.neighbors import KNeighborsClassifier
-                    model = KNeighborsClassifier(n_neighbors=5)
-                elif model_name == 'decision_tree':
-                    from sklearn.tree import DecisionTreeClassifier
-                    model = DecisionTreeClassifier(random_state=42)
-                else:  # naive_bayes
-                    from sklearn.naive_bayes import GaussianNB
-                    model = GaussianNB()
-
-                self.model_manager.models[model_key] = model
-                self.model_manager.train_model(X_train_vec, y_train, model_key)
+    def build_generation(self, sample_size: int) -> Tuple[ModelGeneration, dict]:
+        """
+        Fit vectorizers and train every enabled model into a new generation,
+        without touching the one serving requests. The loaded embedding
+        encoder and its cache are shared, since they need no fitting.
+        """
+        training_config = self.get_training_config(sample_size)
+        generation = ModelGeneration(
+            VectorizerManager(self.methods, embedding_vectorizer=self.vectorizer_manager.embedding_vectorizer),
+            ClassificationModelManager(self.label_to_id, self.id_to_label)
+        )
+        print(f"Building generation {generation.generation_id}...")
 
-        self.is_initialized = True
-        print("Classification service initialized successfully!")
+        X_train, _, y_train, _ = self.load_training_data(sample_size)
+        print("Fitting vectorizers...")
+        generation.vectorizer_manager.fit_vectorizers(X_train)
+        self.train_methods(X_train, y_train, self.methods, generation)
+        # Process workers and the other serving workers load the new generation from the bundle
+        with self._artifact_lock():
+            self._save_artifacts(training_config, generation)
+        return generation, training_config
 
-    def classify_text(self, text: str, vectorization_method: str = 'embeddings', model_name: str = None) -> ClassificationResponse:
-        """Classify a single text"""
-        start_time = time.time()
-        
+    def start_retrain(self, sample_size: int):
+        """
+        Retrain in a background task and atomically swap the new generation
+        in. Requests keep being served by the current generation meanwhile.
+        """
         if not self.is_initialized:
             raise ValueError("Service not initialized. Please call initialize() first.")
+        if self.is_retraining:
+            raise ValueError("A retrain is already in progress")
+        warming = [method for method in self.methods if self.method_status[method] in ('pending', 'warming')]
+        if warming:
+            raise ValueError(f"Wait for {', '.join(warming)} to finish warming up before retraining")
+        if self.inference_executor.kind == 'process' and not settings.save_artifacts:
+            raise ValueError("Retraining with process workers requires SAVE_ARTIFACTS=true")
 
-        # Preprocess text
-        processed_text = preprocess_text(text)
-        
-        # Vectorize text
+        self.retrain_task = asyncio.create_task(self._retrain(sample_size))
+
+    @property
+    def is_retraining(self) -> bool:
+        return self.retrain_task is not None and not self.retrain_task.done()
+
+    async def _retrain(self, sample_size: int):
+        start_time = time.time()
+        self.last_retrain = {'status': 'running', 'started_at': datetime.now().isoformat(), 'sample_size': sample_size}
         try:
-            X = self.vectorizer_manager.transform_text(processed_text, vectorization_method)
+            generation, training_config = await asyncio.to_thread(self.build_generation, sample_size)
+            with self._update_lock:
+                previous = self._publish(generation)
+            if self.inference_executor.kind == 'process':
+                # New workers load the new bundle; the old pool drains its queued requests
+                self.inference_executor.restart(sample_size)
         except Exception as e:
-            raise ValueError(f"Vectorization failed: {str(e)}")
+            self.last_retrain.update({'status': 'failed', 'error': str(e)})
+            print(f"Retraining failed: {str(e)}")
+            return
 
-        predictions = {}
-        
-        if model_name:
-            # Use specific model
-            model_key = f"{model_name}_{vectorization_method}"
-            if model_key in self.model_manager.models and self.model_manager.is_trained.get(model_key, False):
+        self.training_config = training_config
+        # Incremental samples were applied to the previous generation only
+        self.incremental_samples = 0
+        self._set_method_status(self.methods, 'ready')
+        duration = time.time() - start_time
+        self.last_retrain.update({
+            'status': 'completed',
+            'duration': duration,
+            'generation_id': generation.generation_id,
+            'previous_generation_id': previous.generation_id
+        })
+        INITIALIZATION_DURATION.set(duration, source='retrain')
+        self._record_memory_metrics()
+
+    def train_incremental(self, texts: List[str], labels: List[str], methods: Optional[List[str]] = None, persist: bool = False) -> IncrementalTrainingResponse:
+        """
+        Add labeled abstracts to the trained models without a full retrain.
+        The bow/tfidf vocabularies and idf weights stay frozen (unseen words
+        are ignored); hashing has no vocabulary, so new words count at once,
+        but its idf weights are frozen too. Naive Bayes, KMeans and KNN are updated in O(batch);
+        decision trees keep their current fit until the next full retrain.
+        """
+        start_time = time.time()
+
+        if not self.is_initialized:
+            raise ValueError("Service not initialized. Please call initialize() first.")
+        if len(texts) != len(labels):
+            raise ValueError("texts and labels must have the same length")
+        unknown = sorted(set(labels) - set(self.categories))
+        if unknown:
+            raise ValueError(f"Unknown labels: {unknown}. Must be one of: {self.categories}")
+
+        methods = methods or [method for method in self.methods if self.method_status[method] == 'ready']
+        for method in methods:
+            if self.method_status.get(method) != 'ready':
+                raise ValueError(f"Vectorization method {method} is not ready")
+
+        processed_texts = preprocess_batch(texts)
+        y = [self.label_to_id[label] for label in labels]
+
+        with self._update_lock:
+            # Update copies of the current models and publish them as a new generation
+            current = self.generation
+            generation = ModelGeneration(current.vectorizer_manager, current.model_manager.copy())
+            updates = {}
+            for method in methods:
+                X = generation.vectorizer_manager.transform_texts(processed_texts, method, stage='train_vectorize')
+                for model_name in self.model_names:
+                    model_key = f"{model_name}_{method}"
+                    if generation.model_manager.is_trained.get(model_key, False):
+                        updates[model_key] = generation.model_manager.partial_update(model_key, X, y)
+
+            # Other serving workers only see updates through the bundle
+            if (persist or self.worker_registry is not None) and self.training_config is not None:
+                with self._artifact_lock():
+                    self._save_artifacts(self.training_config, generation)
+            self._publish(generation)
+            self.incremental_samples += len(texts)
+
+        print(f"Incrementally updated {sum(status == 'updated' for status in updates.values())} models with {len(texts)} samples")
+        return IncrementalTrainingResponse(
+            samples=len(texts),
+            total_incremental_samples=self.incremental_samples,
+            models=updates,
+            artifact_id=generation.artifact_id,
+            generation_id=generation.generation_id,
+            processing_time=time.time() - start_time
+        )
+
+    def _predict_all(self, generation: ModelGeneration, X, n_samples: int, vectorization_method: str, model_name: str = None) -> List[Dict[str, ModelPrediction]]:
+        """Run each requested model of a generation once over the whole feature matrix"""
+        with STAGE_DURATION.time(stage='predict', method=vectorization_method):
+            return self._predict_models(generation.model_manager, X, n_samples, vectorization_method, model_name)
+
+    def _predict_models(self, model_manager: ClassificationModelManager, X, n_samples: int, vectorization_method: str, model_name: str = None) -> List[Dict[str, ModelPrediction]]:
+        results = [{} for _ in range(n_samples)]
+        base_model_names = [model_name] if model_name else self.model_names
+
+        for base_model_name in base_model_names:
+            model_key = f"{base_model_name}_{vectorization_method}"
+
+            if model_key in model_manager.models and model_manager.is_trained.get(model_key, False):
                 try:
-                    pred_label, confidence = self.model_manager.predict_single(X, model_key)
-                    predictions[model_name] = ModelPrediction(
-                        prediction=pred_label,
-                        confidence=confidence
-                    )
-                except Exception as e:
-                    predictions[model_name] = ModelPrediction(
-                        prediction="Error",
-                        confidence=0.0,
-                        error=str(e)
-                    )
-            else:
-                predictions[model_name] = ModelPrediction(
-                    prediction="Error",
-                    confidence=0.0,
-                    error="Model not available or not trained"
-                )
-        else:
-            # Use all models for this vectorization method
-            for base_model_name in ['kmeans', 'knn', 'decision_tree', 'naive_bayes']:
-                model_key = f"{base_model_name}_{vectorization_method}"
-                
-                if model_key in self.model_manager.models and self.model_manager.is_trained.get(model_key, False):
-                    try:
-                        pred_label, confidence = self.model_manager.predict_single(X, model_key)
-                        predictions[base_model_name] = ModelPrediction(
-                            prediction=pred_label,
-                            confidence=confidence
+                    labels, confidences = model_manager.predict_labels(X, model_key)
+                    for i in range(n_samples):
+                        results[i][base_model_name] = ModelPrediction(
+                            prediction=labels[i],
+                            confidence=confidences[i]
                         )
-                    except Exception as e:
-                        predictions[base_model_name] = ModelPrediction(
+                except Exception as e:
+                    for i in range(n_samples):
+                        results[i][base_model_name] = ModelPrediction(
                             prediction="Error",
                             confidence=0.0,
                             error=str(e)
                         )
+            elif model_name:
+                # A specific model was requested but can't be used
+                for i in range(n_samples):
+                    results[i][base_model_name] = ModelPrediction(
+                        prediction="Error",
+                        confidence=0.0,
+                        error="Model not available or not trained"
+                    )
 
-        processing_time = time.time() - start_time
+        return results
+
+    def _classify_cascade(self, generation: ModelGeneration, processed_texts: List[str]):
+        """
+        Run the gate model on the cheap first method and escalate only the
+        texts it is unsure about. Each text is answered by the pair the
+        threshold was calibrated for: the gate model when it is confident,
+        the escalation model otherwise. Returns per-text predictions,
+        answering stages and gate confidences, plus the time spent vectorizing.
+        """
+        first_method = settings.cascade_first_method
+        escalation_method = settings.cascade_escalation_method
+        gate_model = settings.cascade_gate_model
+
+        vectorize_start = time.time()
+        X_first = generation.vectorizer_manager.transform_texts(processed_texts, first_method)
+        vectorize_time = time.time() - vectorize_start
+
+        with STAGE_DURATION.time(stage='predict', method=first_method):
+            gate_labels, gate_confidences = generation.model_manager.predict_labels(X_first, f"{gate_model}_{first_method}")
+        confident = np.asarray(gate_confidences) >= self.cascade_threshold
+
+        predictions = [None] * len(processed_texts)
+        stages = [first_method if is_confident else escalation_method for is_confident in confident]
+
+        answered = np.flatnonzero(confident)
+        if len(answered):
+            for i in answered:
+                predictions[i] = {gate_model: ModelPrediction(prediction=gate_labels[i], confidence=gate_confidences[i])}
+            CASCADE_STAGES.inc(len(answered), stage=first_method)
+
+        escalated = np.flatnonzero(~confident)
+        if len(escalated):
+            vectorize_start = time.time()
+            X_escalated = generation.vectorizer_manager.transform_texts(
+                [processed_texts[i] for i in escalated], escalation_method
+            )
+            vectorize_time += time.time() - vectorize_start
+            escalated_predictions = self._predict_all(
+                generation, X_escalated, len(escalated), escalation_method, settings.cascade_escalation_model
+            )
+            for i, result in zip(escalated, escalated_predictions):
+                predictions[i] = result
+            CASCADE_STAGES.inc(len(escalated), stage=escalation_method)
+
+        return predictions, stages, [float(confidence) for confidence in gate_confidences], vectorize_time
 
+    def _response_cache_key(self, generation: ModelGeneration, processed_text: str, vectorization_method: str, model_name: str, use_cache: bool) -> Optional[str]:
+        if not use_cache or self.response_cache is None:
+            return None
+        return ResponseCache.make_key(processed_text, vectorization_method, model_name, generation.generation_id)
+
+    def _cached_response(self, cache_key: Optional[str], generation: ModelGeneration, text: str, vectorization_method: str, start_time: float) -> Optional[ClassificationResponse]:
+        """Build the response from the cache, or return None on a miss"""
+        cached = self.response_cache.get(cache_key) if cache_key else None
+        if cached is None:
+            return None
+        CLASSIFIED_TEXTS.inc(method=vectorization_method)
         return ClassificationResponse(
+            input_text=text,
+            vectorization_method=vectorization_method,
+            processing_time=time.time() - start_time,
+            generation_id=generation.generation_id,
+            cached=True,
+            **cached
+        )
+
+    def _cache_response(self, cache_key: Optional[str], generation: ModelGeneration, response: ClassificationResponse):
+        # Errors may be transient (e.g. a method still warming up), so they aren't cached
+        if cache_key is None or any(prediction.error for prediction in response.predictions.values()):
+            return
+        self.response_cache.put(
+            cache_key,
+            response.model_dump(include={'predictions', 'cascade_stage', 'cascade_confidence'}),
+            generation_id=generation.generation_id
+        )
+
+    def classify_text(self, text: str, vectorization_method: str = 'embeddings', model_name: str = None, use_cache: bool = True, deadline: Optional[float] = None) -> ClassificationResponse:
+        """Classify a single text; work is dropped if deadline (a time.time() timestamp) passes first"""
+        if not self.is_initialized:
+            raise ValueError("Service not initialized. Please call initialize() first.")
+
+        # The whole request uses the generation that is current now
+        with self.generation.use() as generation:
+            return self._classify_text(generation, text, vectorization_method, model_name, use_cache, deadline)
+
+    def _classify_text(self, generation: ModelGeneration, text: str, vectorization_method: str, model_name: str = None, use_cache: bool = True, deadline: Optional[float] = None) -> ClassificationResponse:
+        start_time = time.time()
+
+        # Preprocess text
+        with STAGE_DURATION.time(stage='preprocess', method=vectorization_method):
+            processed_text = preprocess_text(text)
+
+        cache_key = self._response_cache_key(generation, processed_text, vectorization_method, model_name, use_cache)
+        response = self._cached_response(cache_key, generation, text, vectorization_method, start_time)
+        if response is not None:
+            return response
+        # The request may have waited for a pool worker; don't vectorize for a caller that gave up
+        check_deadline(deadline, 'vectorization')
+        
+        cascade_stage = cascade_confidence = None
+        if vectorization_method == CASCADE_METHOD:
+            # Escalate to the expensive method only when the gate is unsure
+            try:
+                predictions, stages, confidences, _ = self._classify_cascade(generation, [processed_text])
+            except Exception as e:
+                raise ValueError(f"Vectorization failed: {str(e)}")
+            predictions, cascade_stage, cascade_confidence = predictions[0], stages[0], confidences[0]
+        else:
+            # Vectorize text
+            try:
+                X = generation.vectorizer_manager.transform_text(processed_text, vectorization_method)
+            except Exception as e:
+                raise ValueError(f"Vectorization failed: {str(e)}")
+
+            predictions = self._predict_all(generation, X, 1, vectorization_method, model_name)[0]
+
+        processing_time = time.time() - start_time
+        STAGE_DURATION.observe(processing_time, stage='total', method=vectorization_method)
+        CLASSIFIED_TEXTS.inc(method=vectorization_method)
+
+        response = ClassificationResponse(
             input_text=text,
             vectorization_method=vectorization_method,
             predictions=predictions,
-            processing_time=processing_time
+            processing_time=processing_time,
+            cascade_stage=cascade_stage,
+            cascade_confidence=cascade_confidence,
+            generation_id=generation.generation_id
+        )
+        self._cache_response(cache_key, generation, response)
+        return response
+
+    def start_workers(self, sample_size: int):
+        """Start the inference pool and route micro-batched encoding through it"""
+        if self.inference_executor.kind == 'process':
+            # Process workers only load the bundle, so it must hold the generation served here
+            manifest = read_manifest(settings.artifact_dir)
+            if manifest is None or manifest.get('bundle_id') != self.generation.artifact_id:
+                raise ValueError(
+                    f"Process inference workers need the served generation's artifact bundle in "
+                    f"{settings.artifact_dir}; set SAVE_ARTIFACTS=true"
+                )
+        self.inference_executor.start(sample_size)
+        if self.embedding_batcher is not None:
+            self.embedding_batcher.executor = self.inference_executor.thread_pool
+
+    def stop_workers(self):
+        self.inference_executor.shutdown()
+
+    async def classify_text_async(self, text: str, vectorization_method: str = 'embeddings', model_name: str = None, use_cache: bool = True, deadline: Optional[float] = None) -> ClassificationResponse:
+        """
+        Classify a single text without blocking the event loop.
+        With a thread pool, embedding work is micro-batched with concurrent
+        requests; otherwise the whole call runs on a pool worker.
+        """
+        use_batcher = (
+            vectorization_method == 'embeddings'
+            and self.embedding_batcher is not None
+            and self.inference_executor.kind == 'thread'
+        )
+        if not use_batcher:
+            return await self.inference_executor.run_service(
+                'classify_text',
+                text=text,
+                vectorization_method=vectorization_method,
+                model_name=model_name,
+                use_cache=use_cache,
+                deadline=deadline
+            )
+
+        if not self.is_initialized:
+            raise ValueError("Service not initialized. Please call initialize() first.")
+
+        with self.generation.use() as generation:
+            start_time = time.time()
+
+            # Preprocess text
+            with STAGE_DURATION.time(stage='preprocess', method=vectorization_method):
+                processed_text = preprocess_text(text)
+
+            cache_key = self._response_cache_key(generation, processed_text, vectorization_method, model_name, use_cache)
+            response = self._cached_response(cache_key, generation, text, vectorization_method, start_time)
+            if response is not None:
+                return response
+
+            # Vectorize text together with other in-flight requests; the shared
+            # encoder gives the same vectors in every generation
+            try:
+                with STAGE_DURATION.time(stage='embedding_queue', method=vectorization_method):
+                    vector = await self.embedding_batcher.submit(processed_text, deadline)
+            except (QueueFullError, DeadlineExceededError):
+                raise
+            except Exception as e:
+                raise ValueError(f"Vectorization failed: {str(e)}")
+            X = vector.reshape(1, -1)
+
+            predictions = (await self.inference_executor.run(
+                self._predict_all, generation, X, 1, vectorization_method, model_name
+            ))[0]
+
+            processing_time = time.time() - start_time
+            STAGE_DURATION.observe(processing_time, stage='total', method=vectorization_method)
+            CLASSIFIED_TEXTS.inc(method=vectorization_method)
+
+            response = ClassificationResponse(
+                input_text=text,
+                vectorization_method=vectorization_method,
+                predictions=predictions,
+                processing_time=processing_time,
+                generation_id=generation.generation_id
+            )
+            self._cache_response(cache_key, generation, response)
+            return response
+
+    async def classify_batch_async(self, texts: List[str], vectorization_method: str = 'embeddings', model_name: str = None, deadline: Optional[float] = None) -> BatchClassificationResponse:
+        """Classify many texts on a pool worker"""
+        return await self.inference_executor.run_service(
+            'classify_batch',
+            texts=texts,
+            vectorization_method=vectorization_method,
+            model_name=model_name,
+            deadline=deadline
+        )
+
+    def classify_batch(self, texts: List[str], vectorization_method: str = 'embeddings', model_name: str = None, deadline: Optional[float] = None) -> BatchClassificationResponse:
+        """Classify many texts, vectorizing them as one matrix and calling each model once"""
+        if not self.is_initialized:
+            raise ValueError("Service not initialized. Please call initialize() first.")
+
+        # Every text of the batch is classified by the same generation
+        with self.generation.use() as generation:
+            return self._classify_batch(generation, texts, vectorization_method, model_name, deadline)
+
+    def _classify_batch(self, generation: ModelGeneration, texts: List[str], vectorization_method: str, model_name: str = None, deadline: Optional[float] = None) -> BatchClassificationResponse:
+        check_deadline(deadline, 'preprocessing')
+        start_time = time.time()
+
+        # Preprocess texts
+        processed_texts = preprocess_batch(texts)
+        preprocess_end = time.time()
+        STAGE_DURATION.observe(preprocess_end - start_time, stage='preprocess', method=vectorization_method)
+
+        stages = confidences = [None] * len(texts)
+        if vectorization_method == CASCADE_METHOD:
+            try:
+                predictions, stages, confidences, vectorize_time = self._classify_cascade(generation, processed_texts)
+            except Exception as e:
+                raise ValueError(f"Vectorization failed: {str(e)}")
+            predict_end = time.time()
+            vectorize_end = preprocess_end + vectorize_time
+        else:
+            # Vectorize all texts together
+            try:
+                X = generation.vectorizer_manager.transform_texts(processed_texts, vectorization_method)
+            except Exception as e:
+                raise ValueError(f"Vectorization failed: {str(e)}")
+            vectorize_end = time.time()
+
+            predictions = self._predict_all(generation, X, len(texts), vectorization_method, model_name)
+            predict_end = time.time()
+        STAGE_DURATION.observe(predict_end - start_time, stage='total', method=vectorization_method)
+        CLASSIFIED_TEXTS.inc(len(texts), method=vectorization_method)
+
+        results = [
+            BatchClassificationResult(
+                input_text=text,
+                predictions=text_predictions,
+                cascade_stage=stage,
+                cascade_confidence=confidence
+            )
+            for text, text_predictions, stage, confidence in zip(texts, predictions, stages, confidences)
+        ]
+
+        return BatchClassificationResponse(
+            vectorization_method=vectorization_method,
+            results=results,
+            timing=BatchTiming(
+                preprocessing=preprocess_end - start_time,
+                vectorization=vectorize_end - preprocess_end,
+                prediction=predict_end - vectorize_end
+            ),
+            processing_time=predict_end - start_time,
+            generation_id=generation.generation_id
         )
 
     def get_status(self) -> TrainingStatus:
         """Get the current status of the service"""
+        generation = self.generation
         return TrainingStatus(
-            models_trained=self.model_manager.get_model_status(),
-            vectorizers_fitted=self.vectorizer_manager.is_fitted,
-            available_categories=self.categories
+            models_trained=generation.model_manager.get_model_status(),
+            vectorizers_fitted=generation.vectorizer_manager.is_fitted,
+            available_categories=self.categories,
+            artifact_id=generation.artifact_id,
+            memory=self.get_memory_usage(),
+            generation={
+                **generation.get_info(),
+                'retired': self.generations.get_retired(),
+                'retraining': self.is_retraining,
+                'last_retrain': self.last_retrain
+            },
+            method_status=self.method_status,
+            model_fit_times=generation.model_manager.fit_times,
+            cascade={
+                'first_method': settings.cascade_first_method,
+                'gate_model': settings.cascade_gate_model,
+                'escalation_method': settings.cascade_escalation_method,
+                'escalation_model': settings.cascade_escalation_model,
+                'threshold': self.cascade_threshold,
+                'threshold_source': self.cascade_threshold_source,
+                'status': self.get_method_status(CASCADE_METHOD)
+            },
+            embedding_cache=self.vectorizer_manager.embedding_cache.get_stats(),
+            response_cache=self.response_cache.get_stats() if self.response_cache else None,
+            admission=self.admission.get_stats() if self.admission else None,
+            embedding_batcher=self.embedding_batcher.get_stats() if self.embedding_batcher else None
         )
 
 # Global instance
@@ -0,0 +1,180 @@
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.utils import preprocess_text
+
+RECORD_FIELDS = ['abstract', 'categories']
+PARQUET_EXTENSIONS = ('.parquet',)
+JSONL_EXTENSIONS = ('.jsonl', '.json', '.ndjson')
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+
+
+def _iter_parquet(path: str, batch_size: int) -> Iterator[Dict]:
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=RECORD_FIELDS):
+        yield from batch.to_pylist()
+
+
+def _iter_arrow(path: str) -> Iterator[Dict]:
+    import pyarrow as pa
+
+    with pa.memory_map(path, 'r') as source:
+        try:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            source.seek(0)
+            batches = pa.ipc.open_stream(source)
+        for batch in batches:
+            yield from batch.select(RECORD_FIELDS).to_pylist()
+
+
+def _iter_jsonl(path: str) -> Iterator[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _resolve_files(source: str) -> List[str]:
+    """Expand a file, directory or glob pattern into a sorted list of shards"""
+    if os.path.isdir(source):
+        pattern = os.path.join(source, '**', '*')
+        paths = glob.glob(pattern, recursive=True)
+    else:
+        paths = glob.glob(source)
+
+    extensions = PARQUET_EXTENSIONS + JSONL_EXTENSIONS + ARROW_EXTENSIONS
+    files = sorted(path for path in paths if os.path.isfile(path) and path.endswith(extensions))
+    if not files:
+        raise ValueError(f"No Parquet/JSONL/Arrow files found for {source}")
+    return files
+
+
+def _chunked(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def process_chunk(records: List[Dict], categories: List[str]) -> List[Tuple[str, str]]:
+    """Keep single-category records in known categories and preprocess their abstracts"""
+    results = []
+    for record in records:
+        record_categories = record.get('categories') or ''
+        if len(record_categories.split(' ')) != 1:
+            continue
+
+        category = record_categories.strip().split('.')[0]
+        if category not in categories:
+            continue
+
+        results.append((preprocess_text(record['abstract']), category))
+    return results
+
+
+class TrainingDataLoader:
+    """
+    Streams training samples from local Parquet/JSONL/Arrow shards or a
+    Hugging Face dataset in streaming mode. Filtering and preprocessing run
+    on parallel chunks, and only the selected samples are kept in memory.
+    """
+
+    def __init__(
+        self,
+        categories: List[str],
+        source: Optional[str] = None,
+        dataset_name: str = "UniverseTBD/arxiv-abstracts-large",
+        chunk_size: int = 1000,
+        workers: int = 1,
+        per_category: Optional[int] = None
+    ):
+        self.categories = categories
+        self.source = source
+        self.dataset_name = dataset_name
+        self.chunk_size = chunk_size
+        self.workers = max(1, workers)
+        self.per_category = per_category
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Yield raw records one at a time from the configured source"""
+        if not self.source:
+            from datasets import load_dataset
+            yield from load_dataset(self.dataset_name, split='train', streaming=True)
+            return
+
+        for path in _resolve_files(self.source):
+            if path.endswith(PARQUET_EXTENSIONS):
+                yield from _iter_parquet(path, self.chunk_size)
+            elif path.endswith(ARROW_EXTENSIONS):
+                yield from _iter_arrow(path)
+            else:
+                yield from _iter_jsonl(path)
+
+    def _iter_processed_chunks(self) -> Iterator[List[Tuple[str, str]]]:
+        chunks = _chunked(self.iter_records(), self.chunk_size)
+
+        if self.workers == 1:
+            for chunk in chunks:
+                yield process_chunk(chunk, self.categories)
+            return
+
+        # Keep a bounded number of chunks in flight and yield them in input order
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = []
+            try:
+                for chunk in chunks:
+                    pending.append(pool.submit(process_chunk, chunk, self.categories))
+                    if len(pending) >= self.workers * 2:
+                        yield pending.pop(0).result()
+                while pending:
+                    yield pending.pop(0).result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def iter_batches(self, sample_size: int) -> Iterator[Tuple[List[str], List[str]]]:
+        """
+        Yield (texts, labels) batches until sample_size samples have been
+        selected, or until every per-category quota is filled.
+        """
+        counts = {category: 0 for category in self.categories}
+        total = 0
+
+        for processed in self._iter_processed_chunks():
+            texts, labels = [], []
+            for text, category in processed:
+                if self.per_category and counts[category] >= self.per_category:
+                    continue
+                texts.append(text)
+                labels.append(category)
+                counts[category] += 1
+                total += 1
+                if total >= sample_size:
+                    break
+
+            if texts:
+                yield texts, labels
+
+            if total >= sample_size:
+                return
+            if self.per_category and all(count >= self.per_category for count in counts.values()):
+                return
+
+    def load(self, sample_size: int) -> Tuple[List[str], List[str]]:
+        """Collect the selected samples into (texts, labels) lists"""
+        texts, labels = [], []
+        for batch_texts, batch_labels in self.iter_batches(sample_size):
+            texts.extend(batch_texts)
+            labels.extend(batch_labels)
+        return texts, labels
@@ -0,0 +1,157 @@
+"""
+Offline evaluation of every {model}_{method} combination on held-out texts.
+
+Quality (accuracy, macro-F1, confusion matrix) is scored for all
+combinations in parallel. Latency and throughput are then measured one
+combination at a time so the timings don't disturb each other. The report
+marks the Pareto-optimal combinations: those no other combination beats on
+accuracy without also being slower (or, in the second front, bigger).
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score
+
+from app.utils.memory import deep_nbytes
+
+
+def encoder_nbytes(embedding_vectorizer) -> Optional[int]:
+    """Bytes of the encoder's torch parameters and buffers, or None if it isn't a torch module"""
+    model = embedding_vectorizer.model
+    if not hasattr(model, 'parameters'):
+        return None
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+def _percentile_ms(samples: List[float], q: float) -> float:
+    return float(np.percentile(np.asarray(samples) * 1000.0, q))
+
+
+def score_combinations(vectorizer_manager, model_manager, texts: List[str], y: Sequence[int], methods: List[str], model_names: List[str], n_labels: int, jobs: int = 1) -> Dict[str, Dict]:
+    """Accuracy, macro-F1 and confusion matrix of every trained combination, predicted in parallel"""
+    y = np.asarray(y)
+    features = {method: vectorizer_manager.transform_texts(texts, method) for method in methods}
+    model_keys = [
+        (f"{model_name}_{method}", method) for method in methods for model_name in model_names
+        if model_manager.is_trained.get(f"{model_name}_{method}", False)
+    ]
+
+    def score(model_key: str, method: str) -> Dict:
+        predictions, _ = model_manager.predict(features[method], model_key)
+        predictions = np.asarray(predictions)
+        return {
+            'accuracy': float(accuracy_score(y, predictions)),
+            'macro_f1': float(f1_score(y, predictions, labels=range(n_labels), average='macro', zero_division=0)),
+            'confusion_matrix': confusion_matrix(y, predictions, labels=range(n_labels)).tolist()
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {model_key: pool.submit(score, model_key, method) for model_key, method in model_keys}
+        return {model_key: future.result() for model_key, future in futures.items()}
+
+
+def measure_performance(vectorizer_manager, model_manager, texts: List[str], queries: List[str], method: str, model_keys: List[str]) -> Dict[str, Dict]:
+    """
+    Single-text latency (vectorize + predict per query) and batch throughput
+    over texts for each model of one method. Each query is vectorized once
+    and its time is added to every model's predict time.
+    """
+    vectorize_times = []
+    query_features = []
+    for text in queries:
+        start = time.perf_counter()
+        query_features.append(vectorizer_manager.transform_text(text, method))
+        vectorize_times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    X = vectorizer_manager.transform_texts(texts, method)
+    batch_vectorize_time = time.perf_counter() - start
+
+    results = {}
+    for model_key in model_keys:
+        latencies = []
+        for X_query, vectorize_time in zip(query_features, vectorize_times):
+            start = time.perf_counter()
+            model_manager.predict(X_query, model_key)
+            latencies.append(vectorize_time + time.perf_counter() - start)
+
+        start = time.perf_counter()
+        model_manager.predict(X, model_key)
+        batch_time = batch_vectorize_time + time.perf_counter() - start
+
+        results[model_key] = {
+            'p50_ms': _percentile_ms(latencies, 50),
+            'p99_ms': _percentile_ms(latencies, 99),
+            'mean_ms': float(np.mean(latencies) * 1000.0),
+            'throughput_texts_per_s': len(texts) / batch_time if batch_time > 0 else float('inf')
+        }
+    return results
+
+
+def measure_memory(vectorizer_manager, model_manager, model_key: str, method: str, encoder_bytes: Optional[int] = None) -> Dict[str, Optional[int]]:
+    """Bytes held by a combination's model and the vectorizer it needs"""
+    model_bytes = deep_nbytes(model_manager.models[model_key]) + deep_nbytes(model_manager.cluster_label_counts.get(model_key))
+    if method == 'embeddings':
+        vectorizer_bytes = encoder_bytes
+    else:
+        vectorizer_bytes = vectorizer_manager.get_memory_usage().get(f"vectorizer_{method}", 0)
+    return {
+        'model_bytes': model_bytes,
+        'vectorizer_bytes': vectorizer_bytes,
+        'total_bytes': model_bytes + (vectorizer_bytes or 0)
+    }
+
+
+def pareto_front(rows: Dict[str, Dict], maximize: Sequence[str], minimize: Sequence[str]) -> List[str]:
+    """Keys of rows that no other row matches or beats on every objective and strictly beats on one"""
+    def dominates(a: Dict, b: Dict) -> bool:
+        at_least_as_good = (
+            all(a[name] >= b[name] for name in maximize)
+            and all(a[name] <= b[name] for name in minimize)
+        )
+        strictly_better = (
+            any(a[name] > b[name] for name in maximize)
+            or any(a[name] < b[name] for name in minimize)
+        )
+        return at_least_as_good and strictly_better
+
+    return [
+        key for key, row in rows.items()
+        if not any(dominates(other, row) for other_key, other in rows.items() if other_key != key)
+    ]
+
+
+def _format_bytes(size: int) -> str:
+    for unit in ['B', 'KB', 'MB']:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GB"
+
+
+def format_markdown(report: Dict) -> str:
+    """Report table sorted by accuracy, Pareto-optimal combinations marked"""
+    lines = [
+        "# Classifier evaluation",
+        "",
+        f"{report['test_texts']} held-out texts from {report['corpus']}, "
+        f"{report['latency_queries']} latency queries, artifact {report['artifact_id']}.",
+        "",
+        "★ Pareto-optimal on accuracy vs p50 latency; ◆ also counting memory.",
+        "",
+        "| Combination | Accuracy | Macro-F1 | p50 ms | p99 ms | Texts/s | Memory | Pareto |",
+        "|---|---|---|---|---|---|---|---|"
+    ]
+    rows = sorted(report['combinations'].items(), key=lambda item: -item[1]['accuracy'])
+    for model_key, row in rows:
+        marks = ('★' if row['pareto_optimal'] else '') + ('◆' if row['pareto_optimal_with_memory'] else '')
+        lines.append(
+            f"| {model_key} | {row['accuracy']:.4f} | {row['macro_f1']:.4f} | {row['p50_ms']:.2f} | "
+            f"{row['p99_ms']:.2f} | {row['throughput_texts_per_s']:.0f} | "
+            f"{_format_bytes(row['memory']['total_bytes'])} | {marks} |"
+        )
+    return '\n'.join(lines) + '\n'
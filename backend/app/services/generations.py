@@ -0,0 +1,108 @@
+"""
+Model generations: a complete set of fitted vectorizers and trained models.
+
+Requests pin the generation that is current when they start and use it
+until they finish, so a retrain can publish a new generation at any time
+without 503s or predictions that mix two model versions. A replaced
+generation is released once its in-flight requests drain.
+"""
+
+import secrets
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+
+
+def new_generation_id() -> str:
+    """Sortable, unique id such as 20261017T024100-3f2a"""
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{secrets.token_hex(2)}"
+
+
+class ModelGeneration:
+    def __init__(self, vectorizer_manager, model_manager, generation_id: str = None):
+        self.generation_id = generation_id or new_generation_id()
+        self.vectorizer_manager = vectorizer_manager
+        self.model_manager = model_manager
+        self.artifact_id = None
+        self.created_at = datetime.now().isoformat()
+        self.retired_at = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._drained = threading.Event()
+
+    @contextmanager
+    def use(self):
+        """Count a request as in flight on this generation for its duration"""
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                if self._in_flight == 0 and self.retired_at is not None:
+                    self._drained.set()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def retire(self):
+        with self._lock:
+            self.retired_at = datetime.now().isoformat()
+            if self._in_flight == 0:
+                self._drained.set()
+
+    @property
+    def is_drained(self) -> bool:
+        return self._drained.is_set()
+
+    def get_info(self) -> Dict:
+        info = {
+            'generation_id': self.generation_id,
+            'artifact_id': self.artifact_id,
+            'created_at': self.created_at,
+            'in_flight': self._in_flight
+        }
+        if self.retired_at is not None:
+            info['retired_at'] = self.retired_at
+        return info
+
+
+class GenerationRegistry:
+    """Holds the current generation and the retired ones that still serve requests"""
+
+    def __init__(self, initial: ModelGeneration):
+        self._current = initial
+        self._retired: List[ModelGeneration] = []
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> ModelGeneration:
+        return self._current
+
+    def publish(self, generation: ModelGeneration) -> ModelGeneration:
+        """Atomically make a new generation current and retire the previous one"""
+        with self._lock:
+            previous = self._current
+            self._current = generation
+            previous.retire()
+            self._retired.append(previous)
+            print(f"Published generation {generation.generation_id} (replacing {previous.generation_id})")
+            self._release_drained()
+        return previous
+
+    def _release_drained(self):
+        for generation in [g for g in self._retired if g.is_drained]:
+            # Dropping the last reference frees its vectorizers and models
+            self._retired.remove(generation)
+            print(f"Released generation {generation.generation_id}")
+
+    def get_retired_generations(self) -> List[ModelGeneration]:
+        with self._lock:
+            self._release_drained()
+            return list(self._retired)
+
+    def get_retired(self) -> List[Dict]:
+        return [generation.get_info() for generation in self.get_retired_generations()]
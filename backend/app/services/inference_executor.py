@@ -0,0 +1,131 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS']
+
+
+def configure_thread_limits(num_threads: int):
+    """
+    Cap torch and BLAS intra-op threads so that worker processes running
+    in parallel don't oversubscribe the CPU.
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(num_threads)
+
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=num_threads)
+    except ImportError:
+        pass
+
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+
+def _init_process_worker(num_threads: int, sample_size: int, artifact_dir: str):
+    """Load the classification service in a freshly spawned worker process"""
+    configure_thread_limits(num_threads)
+
+    from app.services.classification_service import classification_service
+
+    # Workers only read the bundle the parent process wrote. They never train:
+    # each would fit its own generation and the pool would serve several at once
+    settings.artifact_dir = artifact_dir
+    settings.load_artifacts = True
+    settings.save_artifacts = False
+    settings.background_warmup = False
+    asyncio.run(classification_service.initialize(sample_size=sample_size, require_artifacts=True))
+    # Load the embedding encoder before the first request rather than during it
+    classification_service.warm_up()
+
+
+def _run_service_method(method_name: str, kwargs: dict):
+    """Call a ClassificationService method on this process's global instance"""
+    from app.services.classification_service import classification_service
+    return getattr(classification_service, method_name)(**kwargs)
+
+
+class InferenceExecutor:
+    """
+    Runs CPU-bound classification work off the event loop on a thread or
+    process pool.
+    """
+
+    def __init__(self, kind: str = 'thread', max_workers: Optional[int] = None, threads_per_worker: Optional[int] = None):
+        if kind not in ['thread', 'process']:
+            raise ValueError("Executor kind must be either 'thread' or 'process'")
+
+        cpu_count = os.cpu_count() or 1
+        self.kind = kind
+        self.max_workers = max_workers or cpu_count
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.max_workers)
+        self._pool: Optional[Executor] = None
+
+    def start(self, sample_size: int):
+        """Create the pool; process workers load the service from the artifact bundle"""
+        if self._pool is not None:
+            return
+
+        if self.kind == 'thread':
+            # Threads share the process's torch/BLAS pools, which are left at every
+            # core: capping them would run each encode (a micro-batch, a large batch,
+            # a retrain) on threads_per_worker cores however idle the others are
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='inference'
+            )
+        else:
+            # spawn rather than fork: torch's thread pools don't survive fork
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_process_worker,
+                initargs=(self.threads_per_worker, sample_size, settings.artifact_dir)
+            )
+
+        threads = 'sharing torch/BLAS threads' if self.kind == 'thread' else f"{self.threads_per_worker} threads each"
+        logger.info(f"Started {self.kind} inference pool with {self.max_workers} workers, {threads}")
+
+    @property
+    def thread_pool(self) -> Optional[Executor]:
+        """The pool if it can run arbitrary in-process callables, else None"""
+        return self._pool if self.kind == 'thread' else None
+
+    async def run(self, fn, *args, **kwargs):
+        """Run an in-process callable on the thread pool (or the loop's default executor)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.thread_pool, functools.partial(fn, *args, **kwargs))
+
+    async def run_service(self, method_name: str, **kwargs):
+        """Run a ClassificationService method on a pool worker"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, _run_service_method, method_name, kwargs
+        )
+
+    def restart(self, sample_size: int):
+        """
+        Replace the pool so new workers load the current artifact bundle.
+        Work already submitted to the old pool still finishes there.
+        """
+        old_pool = self._pool
+        self._pool = None
+        self.start(sample_size)
+        if old_pool is not None:
+            old_pool.shutdown(wait=False)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .admission import DeadlineExceededError
+
+
+class QueueFullError(Exception):
+    """Raised when the micro-batcher queue is at capacity"""
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-text requests and encodes them in one call.
+
+    A batch is flushed when max_batch_size requests are waiting or window_ms
+    has passed since the first request of the batch arrived. Encoding runs in
+    an executor so the event loop keeps accepting requests meanwhile.
+    Requests whose deadline has passed by then are dropped, not encoded.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        window_ms: float = 5.0,
+        max_batch_size: int = 32,
+        max_queue_size: int = 1000,
+        executor=None
+    ):
+        self.encode_fn = encode_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_queue_size = max_queue_size
+        self.executor = executor
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.expired = 0
+        self.batch_size_histogram = {}
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, text: str, deadline: Optional[float] = None) -> np.ndarray:
+        """Queue a text and wait for its embedding row; deadline is a time.time() timestamp"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((text, future, deadline))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(f"Embedding queue is full ({self.max_queue_size} pending requests)")
+        return await future
+
+    async def _collect(self) -> List:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.window
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        # Drop requests whose callers have already gone away or given up
+        now = time.time()
+        live = []
+        for text, future, deadline in batch:
+            if future.done():
+                continue
+            if deadline is not None and now > deadline:
+                self.expired += 1
+                future.set_exception(DeadlineExceededError("Request deadline passed before encoding"))
+                continue
+            live.append((text, future))
+        return live
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+
+            try:
+                vectors = await loop.run_in_executor(
+                    self.executor, self.encode_fn, [text for text, _ in batch]
+                )
+                for (_, future), vector in zip(batch, vectors):
+                    if not future.done():
+                        future.set_result(vector)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            self._record(len(batch))
+
+    def _record(self, batch_size: int):
+        self.batches += 1
+        self.items += batch_size
+
+        # Power-of-two buckets: le_1, le_2, le_4, ...
+        bucket = 1
+        while bucket < batch_size:
+            bucket *= 2
+        key = f"le_{bucket}"
+        self.batch_size_histogram[key] = self.batch_size_histogram.get(key, 0) + 1
+
+    async def stop(self):
+        """Cancel the worker task"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batch counters, the batch size histogram and the current queue depth"""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'rejected': self.rejected,
+            'expired': self.expired,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'batch_size_histogram': dict(sorted(
+                self.batch_size_histogram.items(), key=lambda item: int(item[0][3:])
+            ))
+        }
@@ -0,0 +1,184 @@
+"""
+Cache of classification responses for repeated requests.
+
+Entries are keyed on a hash of (preprocessed text, vectorization method,
+model name, model generation): a retrained or incrementally updated model
+is a new generation, so its requests never see the previous one's answers.
+Entries expire after a TTL and the least recently used ones are evicted
+beyond a size bound.
+
+The 'memory' backend is private to the process. The 'sqlite' backend adds
+a SQLite file behind the in-memory tier, so every serving worker on the
+host benefits from responses any of them computed.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+BACKENDS = ['memory', 'sqlite']
+
+# The SQLite table is trimmed to max_items once every PRUNE_INTERVAL inserts
+PRUNE_INTERVAL = 100
+
+
+class ResponseCache:
+    """Size-bounded LRU of responses with TTL expiry and an optional shared SQLite tier"""
+
+    def __init__(self, max_items: int = 10000, ttl_seconds: float = 3600, backend: str = 'memory', path: Optional[str] = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Response cache backend must be one of: {BACKENDS}")
+        if backend == 'sqlite' and not path:
+            raise ValueError("The sqlite response cache backend needs a path")
+
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self.path = path
+        self._memory = OrderedDict()  # key -> (stored_at, generation_id, value)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._inserts = 0
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.shared_evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(processed_text: str, vectorization_method: str, model_name: Optional[str], generation_id: Optional[str]) -> str:
+        """Hash the inputs that determine a response"""
+        payload = f"{processed_text}\x00{vectorization_method}\x00{model_name or ''}\x00{generation_id or ''}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            # WAL lets workers read while another one writes
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, generation_id TEXT, stored_at REAL, accessed_at REAL, value TEXT)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)')
+        return self._db
+
+    def _is_expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - stored_at > self.ttl_seconds
+
+    def _remember(self, key: str, entry: tuple):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached response for key, or None if it is missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._is_expired(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                del self._memory[key]
+                self.expirations += 1
+                entry = None
+
+            if self.backend == 'sqlite':
+                db = self._connect()
+                row = db.execute(
+                    'SELECT stored_at, generation_id, value FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None and not self._is_expired(row[0], now):
+                    db.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+                    entry = (row[0], row[1], json.loads(row[2]))
+                    self._remember(key, entry)
+                    self.shared_hits += 1
+                    return entry[2]
+                if row is not None:
+                    db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    self.expirations += 1
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Dict, generation_id: Optional[str] = None):
+        """Store a response; value must be JSON-serializable"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, (now, generation_id, value))
+            if self.backend != 'sqlite':
+                return
+
+            db = self._connect()
+            db.execute(
+                'INSERT OR REPLACE INTO responses (key, generation_id, stored_at, accessed_at, value) VALUES (?, ?, ?, ?, ?)',
+                (key, generation_id, now, now, json.dumps(value))
+            )
+            self._inserts += 1
+            if self._inserts % PRUNE_INTERVAL == 0:
+                self._prune(db, now)
+
+    def _prune(self, db: sqlite3.Connection, now: float):
+        """Drop expired rows, then the least recently used ones beyond max_items"""
+        if self.ttl_seconds > 0:
+            self.expirations += db.execute(
+                'DELETE FROM responses WHERE stored_at < ?', (now - self.ttl_seconds,)
+            ).rowcount
+        self.shared_evictions += db.execute(
+            'DELETE FROM responses WHERE key IN ('
+            'SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_items,)
+        ).rowcount
+
+    def invalidate(self, generation_id: Optional[str] = None):
+        """Drop every entry that wasn't produced by generation_id (all of them if None)"""
+        with self._lock:
+            stale = [key for key, entry in self._memory.items() if generation_id is None or entry[1] != generation_id]
+            for key in stale:
+                del self._memory[key]
+            self.invalidations += len(stale)
+
+            if self.backend == 'sqlite':
+                db = self._connect()
+                if generation_id is None:
+                    self.invalidations += db.execute('DELETE FROM responses').rowcount
+                else:
+                    self.invalidations += db.execute(
+                        'DELETE FROM responses WHERE generation_id IS NOT ?', (generation_id,)
+                    ).rowcount
+
+    def get_stats(self) -> Dict:
+        """Get hit/miss counters, hit rate and size"""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            stats = {
+                'backend': self.backend,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'memory_items': len(self._memory),
+                'max_items': self.max_items,
+                'ttl_seconds': self.ttl_seconds
+            }
+            if self.backend == 'sqlite' and self._db is not None:
+                stats['shared_evictions'] = self.shared_evictions
+                stats['shared_items'] = self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            return stats
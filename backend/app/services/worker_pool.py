@@ -0,0 +1,110 @@
+"""
+Coordination between serving processes (uvicorn --workers) on one host.
+
+Workers share state through the filesystem only:
+- artifact_lock: an exclusive file lock, so exactly one worker trains and
+  writes the artifact bundle while the others wait and then load it.
+- WorkerRegistry: each worker writes a small heartbeat file with its
+  readiness and generation, so any worker can answer /health for the pool.
+"""
+
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+@contextmanager
+def artifact_lock(directory: str):
+    """Hold an exclusive lock on an artifact directory across processes"""
+    lock_path = f"{os.path.abspath(directory)}.lock"
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class WorkerRegistry:
+    """Heartbeat files of the serving workers, one JSON file per process"""
+
+    def __init__(self, state_dir: str, expected_workers: int, stale_after: float = 30.0):
+        self.state_dir = state_dir
+        self.expected_workers = expected_workers
+        self.stale_after = stale_after
+        self.pid = os.getpid()
+
+    @property
+    def _path(self) -> str:
+        return os.path.join(self.state_dir, f"{self.pid}.json")
+
+    def publish(self, state: Dict):
+        """Write this worker's state; the rename makes it appear atomically"""
+        os.makedirs(self.state_dir, exist_ok=True)
+        state = dict(state, pid=self.pid, updated_at=time.time())
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._path)
+
+    def remove(self):
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
+
+    def read_all(self) -> List[Dict]:
+        """States of live workers; files of dead or silent workers are dropped"""
+        if not os.path.isdir(self.state_dir):
+            return []
+
+        states = []
+        now = time.time()
+        for name in os.listdir(self.state_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.state_dir, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not _is_alive(state['pid']) or now - state['updated_at'] > self.stale_after:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            states.append(state)
+        return sorted(states, key=lambda state: state['pid'])
+
+    def get_pool_status(self) -> Optional[Dict]:
+        """
+        Aggregate readiness: the pool is ready once every expected worker is
+        up and ready and they all serve the same generation
+        """
+        workers = self.read_all()
+        ready = [worker for worker in workers if worker.get('ready')]
+        generations = sorted({worker.get('generation_id') for worker in workers})
+        return {
+            'expected_workers': self.expected_workers,
+            'live_workers': len(workers),
+            'ready_workers': len(ready),
+            'generations': generations,
+            'ready': len(ready) >= self.expected_workers and len(generations) == 1,
+            'workers': workers
+        }
@@ -0,0 +1,72 @@
+"""
+In-memory size accounting for fitted vectorizers and models.
+
+Sizes are measured by walking an object's attributes rather than pickling
+it, so they reflect what the process actually holds. Every numpy buffer is
+counted once per `seen` set: estimators that share a matrix, e.g. model
+generations that share unchanged models, are not double-counted.
+"""
+
+import sys
+import types
+from typing import Any, Optional, Set
+
+import numpy as np
+from scipy import sparse
+
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def _array_nbytes(array: np.ndarray, seen: Set) -> int:
+    # Views share their base's buffer; count the base once
+    root = array
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+    if isinstance(root, np.memmap):
+        # File-backed pages live in the OS page cache, shared between processes
+        return 0
+    key = ('buffer', root.__array_interface__['data'][0])
+    if key in seen:
+        return 0
+    seen.add(key)
+    return root.nbytes
+
+
+def deep_nbytes(obj: Any, seen: Optional[Set] = None) -> int:
+    """Approximate bytes held by obj and everything it references, counting shared objects once"""
+    seen = set() if seen is None else seen
+    if obj is None or isinstance(obj, _SKIPPED_TYPES):
+        return 0
+    if isinstance(obj, np.ndarray):
+        # Arrays are deduplicated by buffer address, since __getstate__ may return fresh views
+        size = _array_nbytes(obj, seen)
+        if obj.dtype == object:
+            size += sum(deep_nbytes(item, seen) for item in obj.ravel())
+        return size
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if sparse.issparse(obj):
+        return sum(deep_nbytes(getattr(obj, name, None), seen) for name in ('data', 'indices', 'indptr', 'row', 'col'))
+    if isinstance(obj, (str, bytes, int, float, bool, np.generic)):
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            deep_nbytes(key, seen) + deep_nbytes(value, seen) for key, value in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(deep_nbytes(item, seen) for item in obj)
+
+    # Estimators and other objects: follow their pickled state, which also
+    # exposes the node arrays of Cython objects such as decision trees
+    try:
+        state = obj.__getstate__()
+    except Exception:
+        state = getattr(obj, '__dict__', None)
+    if isinstance(state, tuple):
+        state = next((item for item in state if isinstance(item, dict)), None)
+    size = sys.getsizeof(obj)
+    if isinstance(state, dict):
+        size += sum(deep_nbytes(value, seen) for value in state.values())
+    return size
@@ -0,0 +1,230 @@
+"""
+Minimal in-process metrics with Prometheus text exposition.
+
+Instruments are cheap to update (a dict lookup and an add under a lock) so
+they can sit on the request path. Counters and gauges may also be backed by a callback
+that is evaluated at scrape time.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = ''
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}"
+        ]
+
+
+class _ValueMetric(_Metric):
+    """A metric holding one number per label set, optionally filled by a scrape-time callback"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+    ):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self.callback = callback
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self.callback is not None:
+            values.update(self.callback())
+        lines = self._header()
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_ValueMetric):
+    metric_type = 'counter'
+
+
+class Gauge(_ValueMetric):
+    metric_type = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    metric_type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [[0] * (len(self.buckets) + 1), 0.0]
+                self._values[key] = state
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        lines = self._header()
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = _format_labels(self.label_names, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                return self._metrics[metric.name]
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = (), callback=None) -> Counter:
+        return self.register(Counter(name, documentation, label_names, callback))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names, callback))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets=DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# Shared instruments used across the service, managers and HTTP layer
+STAGE_DURATION = registry.histogram(
+    'classifier_stage_duration_seconds',
+    'Time spent per classification stage',
+    ['stage', 'method']
+)
+MODEL_PREDICT_DURATION = registry.histogram(
+    'classifier_model_predict_duration_seconds',
+    'Time spent in a single model predict call',
+    ['model', 'method']
+)
+CLASSIFIED_TEXTS = registry.counter(
+    'classifier_texts_classified_total',
+    'Number of texts classified',
+    ['method']
+)
+HTTP_REQUESTS = registry.counter(
+    'classifier_http_requests_total',
+    'HTTP requests by path and status code',
+    ['path', 'status']
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    'classifier_http_request_duration_seconds',
+    'HTTP request latency by path',
+    ['path']
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    'classifier_http_requests_in_flight',
+    'HTTP requests currently being served',
+    ['path']
+)
+INITIALIZATION_DURATION = registry.gauge(
+    'classifier_initialization_duration_seconds',
+    'Duration of the last service initialization',
+    ['source']
+)
+MODEL_MEMORY = registry.gauge(
+    'classifier_model_memory_bytes',
+    'In-memory size of each fitted model, vectorizer and the embedding cache; shared buffers counted once',
+    ['component']
+)
+EMBEDDING_TOKENS = registry.counter(
+    'classifier_embedding_tokens_total',
+    'Tokens sent to the embedding encoder: input, padding added to fill batches, and truncated away',
+    ['kind']
+)
@@ -1,30 +1,55 @@
 import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import List
 
+# Characters dropped by preprocessing: anything that is neither a word
+# character nor whitespace, plus digits
+_REMOVE_PATTERN = re.compile(r'[^\w\s]|\d')
+_NON_ASCII_PATTERN = re.compile(r'[^\x00-\x7f]')
+
+# ASCII deletions as a bytes table, built from the pattern above so both
+# agree character for character. UTF-8 continuation bytes are all >= 0x80,
+# so deleting ASCII bytes never splits a multi-byte character.
+_ASCII_DELETE_BYTES = bytes(
+    code for code in range(128) if _REMOVE_PATTERN.match(chr(code))
+)
+
+# Below this size a process pool costs more than it saves
+MIN_PARALLEL_BATCH_SIZE = 10000
+
+@lru_cache(maxsize=65536)
+def _is_removable(char: str) -> bool:
+    return _REMOVE_PATTERN.match(char) is not None
+
 def preprocess_text(text: str) -> str:
     """
     Preprocess text by removing special characters, digits, and extra spaces.
     Convert to lowercase.
     """
-    # Remove \n characters and leading/trailing spaces
-    text = text.strip().replace("\n", " ")
-    
-    # Remove special characters
-    text = re.sub(r'[^\w\s]', '', text)
-    
-    # Remove digits
-    text = re.sub(r'\d+', '', text)
-    
-    # Remove extra spaces
-    text = re.sub(r'\s+', ' ', text).strip()
-    
+    # Remove ASCII special characters and digits in one C-level pass
+    text = text.encode('utf-8', 'surrogatepass').translate(None, _ASCII_DELETE_BYTES)
+    text = text.decode('utf-8', 'surrogatepass')
+
+    # Remove the (rare) non-ASCII symbols and digits, one distinct char at a time
+    if not text.isascii():
+        for char in set(_NON_ASCII_PATTERN.findall(text)):
+            if _is_removable(char):
+                text = text.replace(char, '')
+
+    # Collapse whitespace (including \n) to single spaces and trim the ends
+    text = ' '.join(text.split())
+
     # Convert to lowercase
-    text = text.lower()
-    
-    return text
+    return text.lower()
 
-def preprocess_batch(texts: List[str]) -> List[str]:
+def preprocess_batch(texts: List[str], processes: int = 1) -> List[str]:
     """
     Preprocess a batch of texts.
+    Large batches are spread over a process pool when processes > 1.
     """
-    return [preprocess_text(text) for text in texts]
\ No newline at end of file
+    if processes > 1 and len(texts) >= MIN_PARALLEL_BATCH_SIZE:
+        chunksize = max(1, len(texts) // (processes * 8))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            return list(pool.map(preprocess_text, texts, chunksize=chunksize))
+    return [preprocess_text(text) for text in texts]
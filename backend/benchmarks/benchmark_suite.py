@@ -0,0 +1,292 @@
+"""
+Latency/throughput benchmark suite across every vectorizer x model combination.
+
+Runs offline against a local JSONL fixture corpus (generated if not given) and
+writes machine-readable JSON so results can be compared between commits:
+- cold start: training initialize() vs loading the artifact bundle
+- per-stage latency: preprocess_text, transform_text per method, predict per model key
+- batch-size scaling of classify_batch
+- end-to-end /classify throughput under a concurrent load generator
+- peak RSS
+
+Usage: python -m benchmarks.benchmark_suite --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.fixtures import make_records, write_fixture_corpus
+
+METHODS = ['bow', 'tfidf', 'hashing', 'embeddings']
+
+
+def enabled_methods() -> List[str]:
+    """Benchmarked methods that ENABLED_METHODS turns on"""
+    from app.config import settings
+    return [method for method in METHODS if method in settings.enabled_methods]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    values = np.asarray(samples) * 1000.0
+    return {
+        'count': int(len(values)),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max())
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def bench_cold_start(service_class, sample_size: int) -> Dict[str, float]:
+    """Time a full training initialize and a load from the bundle it wrote"""
+    start = time.perf_counter()
+    trained = service_class()
+    construct_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    asyncio.run(trained.initialize(sample_size=sample_size))
+    train_time = time.perf_counter() - start
+
+    loaded = service_class()
+    start = time.perf_counter()
+    asyncio.run(loaded.initialize(sample_size=sample_size))
+    load_time = time.perf_counter() - start
+
+    if loaded.artifact_id is None:
+        raise RuntimeError("Second initialize() did not load an artifact bundle")
+
+    return {
+        'construct_s': construct_time,
+        'initialize_train_s': train_time,
+        'initialize_artifact_load_s': load_time
+    }
+
+
+def bench_stages(service, texts: List[str]) -> Dict:
+    """Per-stage latency for every method and every {model}_{method} key"""
+    from app.utils import preprocess_text
+
+    preprocess_times = []
+    processed = []
+    for text in texts:
+        start = time.perf_counter()
+        processed.append(preprocess_text(text))
+        preprocess_times.append(time.perf_counter() - start)
+
+    transform = {}
+    predict = {}
+    for method in enabled_methods():
+        transform_times = []
+        features = []
+        for text in processed:
+            start = time.perf_counter()
+            features.append(service.vectorizer_manager.transform_text(text, method))
+            transform_times.append(time.perf_counter() - start)
+        transform[method] = summarize(transform_times)
+
+        for model_name in service.model_names:
+            model_key = f"{model_name}_{method}"
+            predict_times = []
+            for X in features:
+                start = time.perf_counter()
+                service.model_manager.predict(X, model_key)
+                predict_times.append(time.perf_counter() - start)
+            predict[model_key] = summarize(predict_times)
+
+    return {
+        'preprocess_text': summarize(preprocess_times),
+        'transform_text': transform,
+        'predict': predict
+    }
+
+
+def bench_batch_scaling(service, texts: List[str], batch_sizes: List[int], repeats: int) -> Dict:
+    """classify_batch latency and throughput per method and batch size"""
+    results = {}
+    for method in enabled_methods():
+        results[method] = []
+        for batch_size in batch_sizes:
+            batch = [texts[i % len(texts)] for i in range(batch_size)]
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                service.classify_batch(batch, vectorization_method=method)
+                times.append(time.perf_counter() - start)
+            summary = summarize(times)
+            summary['batch_size'] = batch_size
+            summary['docs_per_s'] = batch_size / (summary['p50_ms'] / 1000.0)
+            results[method].append(summary)
+    return results
+
+
+async def bench_load(texts: List[str], sample_size: int, concurrency: int, requests: int, url: str = None, use_cache: bool = False) -> Dict:
+    """
+    Drive /classify with concurrent clients, in-process via ASGI unless a URL
+    is given. The texts repeat, so the response cache is bypassed unless use_cache.
+    """
+    import httpx
+
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=60.0)
+    else:
+        from app import classification_service
+        from app import main
+
+        await classification_service.initialize(sample_size=sample_size)
+        classification_service.start_workers(sample_size=sample_size)
+        main.initialization_complete = True
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app), base_url='http://bench', timeout=60.0
+        )
+
+    results = {}
+    async with client:
+        for method in enabled_methods():
+            semaphore = asyncio.Semaphore(concurrency)
+            latencies = []
+            errors = 0
+
+            async def send(i: int):
+                nonlocal errors
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.post('/classify', json={
+                        'text': texts[i % len(texts)],
+                        'vectorization_method': method,
+                        'use_cache': use_cache
+                    })
+                    latencies.append(time.perf_counter() - start)
+                    if response.status_code != 200:
+                        errors += 1
+
+            start = time.perf_counter()
+            await asyncio.gather(*[send(i) for i in range(requests)])
+            elapsed = time.perf_counter() - start
+
+            summary = summarize(latencies)
+            summary['requests_per_s'] = requests / elapsed
+            summary['errors'] = errors
+            results[method] = summary
+
+    if not url:
+        from app import classification_service
+        if classification_service.embedding_batcher is not None:
+            await classification_service.embedding_batcher.stop()
+        classification_service.stop_workers()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the classifier benchmark suite")
+    parser.add_argument('--corpus', default=None, help="JSONL corpus with abstract/categories fields")
+    parser.add_argument('--corpus-size', type=int, default=3000)
+    parser.add_argument('--sample-size', type=int, default=1000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--url', default=None, help="Load-test a running server instead of the in-process app")
+    parser.add_argument('--with-cache', action='store_true', help="Keep the embedding and response caches enabled")
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='classifier-bench-')
+    corpus = args.corpus or write_fixture_corpus(os.path.join(workdir, 'corpus.jsonl'), args.corpus_size)
+
+    # Settings are read when app is first imported, so configure through the environment
+    os.environ['TRAINING_DATA'] = corpus
+    os.environ['ARTIFACT_DIR'] = os.path.join(workdir, 'artifacts')
+    os.environ['EMBEDDING_CACHE_DIR'] = os.path.join(workdir, 'embeddings')
+    # Measure fully trained/loaded services rather than background warm-up
+    os.environ['BACKGROUND_WARMUP'] = 'false'
+    if not args.with_cache:
+        os.environ['EMBEDDING_CACHE_SIZE'] = '0'
+        os.environ['EMBEDDING_CACHE_DISK'] = 'false'
+        os.environ['RESPONSE_CACHE'] = 'false'
+
+    from app.config import settings
+    from app.services.classification_service import ClassificationService
+    import sklearn
+
+    # Held-out queries come from a different seed than the training corpus
+    query_texts = [record['abstract'] for record in make_records(args.queries, seed=7)]
+
+    results = {
+        'benchmark': 'classifier_suite',
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'sklearn': sklearn.__version__,
+            'numpy': np.__version__
+        },
+        'config': {
+            'corpus': corpus,
+            'sample_size': args.sample_size,
+            'queries': args.queries,
+            'embedding_cache': args.with_cache,
+            'response_cache': args.with_cache,
+            'inference_executor': settings.inference_executor,
+            'knn_index': settings.knn_index
+        }
+    }
+
+    print("Measuring cold start...")
+    results['cold_start'] = bench_cold_start(ClassificationService, args.sample_size)
+
+    service = ClassificationService()
+    asyncio.run(service.initialize(sample_size=args.sample_size))
+
+    print("Measuring per-stage latency...")
+    results['stages'] = bench_stages(service, query_texts)
+
+    print("Measuring batch-size scaling...")
+    results['batch_scaling'] = bench_batch_scaling(service, query_texts, args.batch_sizes, args.repeats)
+
+    print("Measuring end-to-end /classify throughput...")
+    results['load'] = asyncio.run(bench_load(
+        query_texts, args.sample_size, args.concurrency, args.requests, args.url, use_cache=args.with_cache
+    ))
+
+    results['peak_rss_mb'] = peak_rss_mb()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark for length-bucketed embedding batching.
+
+Encodes the same abstracts with sentence-transformers' default batching (one
+encode() call, inputs sorted by character length, fixed batch size) and with
+EmbeddingVectorizer's token-length buckets under a padded-token budget.
+Reports texts per second, padding overhead and how closely the vectors agree.
+
+Usage: python -m benchmarks.embedding_batching_benchmark --corpus abstracts.jsonl --texts 2000
+"""
+
+import argparse
+import json
+import time
+from typing import List
+
+import numpy as np
+
+from app.config import settings
+from app.models.embedding_backends import compare_embeddings
+from app.models.embedding_batching import plan_batches, padded_tokens
+from app.models.vectorizers import EmbeddingVectorizer
+from benchmarks.fixtures import make_records
+
+def load_texts(corpus: str, size: int) -> List[str]:
+    if not corpus:
+        return [record['abstract'] for record in make_records(size)]
+    texts = []
+    with open(corpus, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            text = record.get('abstract') or record.get('text')
+            if text:
+                texts.append(text)
+            if len(texts) >= size:
+                break
+    return texts
+
+def fixed_batches(order: np.ndarray, batch_size: int) -> List[np.ndarray]:
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+def time_encode(fn, repeats: int):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        vectors = fn()
+        best = min(best, time.perf_counter() - start)
+    return vectors, best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark length-bucketed embedding batching")
+    parser.add_argument('--corpus', default=None, help="JSONL corpus with an abstract or text field")
+    parser.add_argument('--texts', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=settings.embedding_train_batch_size)
+    parser.add_argument('--max-batch-tokens', type=int, default=settings.embedding_max_batch_tokens)
+    parser.add_argument('--backend', default=settings.embedding_backend)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    texts = load_texts(args.corpus, args.texts)
+    vectorizer = EmbeddingVectorizer(
+        backend=args.backend, batch_size=args.batch_size, max_batch_tokens=args.max_batch_tokens
+    )
+    model = vectorizer.model
+    inputs = vectorizer._format_inputs(texts, 'query')
+
+    max_length = model.max_seq_length
+    lengths = [min(len(ids), max_length) for ids in model.tokenizer(inputs, verbose=False)['input_ids']]
+    char_order = np.argsort([-len(text) for text in inputs], kind='stable')
+    padding = {
+        'arrival_order': padded_tokens(lengths, fixed_batches(np.arange(len(inputs)), args.batch_size)),
+        'char_sorted': padded_tokens(lengths, fixed_batches(char_order, args.batch_size)),
+        'token_bucketed': padded_tokens(lengths, plan_batches(lengths, args.batch_size, args.max_batch_tokens))
+    }
+
+    # Warm the encoder up so neither side pays for lazy initialization
+    model.encode(inputs[:8], normalize_embeddings=True)
+
+    default_vectors, default_time = time_encode(
+        lambda: np.asarray(model.encode(inputs, batch_size=args.batch_size, normalize_embeddings=True)),
+        args.repeats
+    )
+    bucketed_vectors, bucketed_time = time_encode(lambda: vectorizer.fit_transform(texts), args.repeats)
+
+    results = {
+        'benchmark': 'embedding_batching',
+        'texts': len(texts),
+        'backend': args.backend,
+        'batch_size': args.batch_size,
+        'max_batch_tokens': args.max_batch_tokens,
+        'mean_tokens': float(np.mean(lengths)),
+        'truncated_texts': int(sum(length >= max_length for length in lengths)),
+        'padding_overhead': {name: tokens / sum(lengths) - 1 for name, tokens in padding.items()},
+        'default_texts_per_s': len(texts) / default_time,
+        'bucketed_texts_per_s': len(texts) / bucketed_time,
+        'speedup': default_time / bucketed_time,
+        'similarity': compare_embeddings(default_vectors, bucketed_vectors)
+    }
+
+    print(f"{len(texts)} texts, mean {results['mean_tokens']:.0f} tokens, {results['truncated_texts']} truncated")
+    for name, overhead in results['padding_overhead'].items():
+        print(f"  padding overhead {name:>15}: {overhead:.1%}")
+    print(
+        f"default {results['default_texts_per_s']:.1f} texts/s, "
+        f"bucketed {results['bucketed_texts_per_s']:.1f} texts/s ({results['speedup']:.2f}x), "
+        f"mean cosine {results['similarity']['mean_cosine']:.5f}"
+    )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()